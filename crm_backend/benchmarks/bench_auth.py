@@ -0,0 +1,54 @@
+"""Per-request overhead of bearer-token authentication.
+
+Compares full HS256 verification on every request with the verified-token
+cache in src/auth.py, both in isolation and through a protected endpoint.
+
+    cd crm_backend && python benchmarks/bench_auth.py [iterations]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import jwt
+from src.main import app
+from src.models import db
+from src.migrate import run_migrations
+from src.auth import decode_token, token_cache
+
+def main(iterations):
+    with app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+    token = jwt.encode({
+        "user_id": 1, "email": "bench@example.com", "role": "Owner",
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1),
+    }, app.config["SECRET_KEY"], algorithm="HS256")
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def uncached_decode():
+        token_cache.clear()
+        decode_token(token)
+
+    def uncached_request():
+        token_cache.clear()
+        client.get("/api/stats", headers=headers)
+
+    results = {}
+    with app.app_context():
+        results["decode, verify every time"] = timeit.timeit(uncached_decode, number=iterations)
+        decode_token(token)
+        results["decode, cache hit"] = timeit.timeit(lambda: decode_token(token), number=iterations)
+    client.get("/api/stats", headers=headers)  # warm the stats cache so the request does no SQL
+    results["GET /api/stats, verify every time"] = timeit.timeit(uncached_request, number=iterations)
+    results["GET /api/stats, cache hit"] = timeit.timeit(lambda: client.get("/api/stats", headers=headers), number=iterations)
+
+    for name, seconds in results.items():
+        print(f"{name:<36} {seconds / iterations * 1e6:9.1f} us/op")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
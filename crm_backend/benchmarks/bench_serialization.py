@@ -0,0 +1,93 @@
+"""List-endpoint serialization throughput, before and after src/serializers.py.
+
+"before" reproduces the old path: hydrate Deal objects (client and rep
+eager-loaded), build dicts with str()/isoformat() per field, encode with
+Flask's stdlib JSON provider. "after" selects column tuples with
+Query.with_entities and encodes them with the app's provider (orjson when
+installed). A final pass times the real GET /api/deals endpoint.
+
+    cd crm_backend && python benchmarks/bench_serialization.py [deals] [rounds]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import jwt
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+from src.main import app
+from src.models import db, Deal, Client, User
+from src.migrate import run_migrations
+from src.routes.deal import deal_query
+from src.serializers import deal_rows, rows_to_dicts, orjson
+
+def seed(count):
+    db.session.execute(insert(User), [
+        {"name": f"Rep {i}", "email": f"rep{i}@example.com", "role": "SalesRep", "password_hash": "x"} for i in range(20)])
+    db.session.execute(insert(Client), [
+        {"company": f"Company {i}", "contact_name": "Contact", "email": f"c{i}@example.com"} for i in range(200)])
+    db.session.execute(insert(Deal), [{
+        "client_id": i % 200 + 1, "sales_rep_id": i % 20 + 1, "stage": "Proposal",
+        "estimated_value": "12500.00", "probability": 0.4, "expected_close": datetime.date(2025, 6, 1),
+    } for i in range(count)])
+    db.session.commit()
+
+def legacy_serialize_deal(deal):
+    return {
+        "id": deal.id,
+        "client_id": deal.client_id,
+        "sales_rep_id": deal.sales_rep_id,
+        "stage": deal.stage,
+        "estimated_value": str(deal.estimated_value),
+        "probability": deal.probability,
+        "created_at": deal.created_at.isoformat(),
+        "updated_at": deal.updated_at.isoformat(),
+        "expected_close": deal.expected_close.isoformat() if deal.expected_close else None,
+        "won_on": deal.won_on.isoformat() if deal.won_on else None,
+        "lost_on": deal.lost_on.isoformat() if deal.lost_on else None,
+        "client_company": deal.client.company if deal.client else None,
+        "sales_rep_name": deal.sales_rep.name if deal.sales_rep else None,
+    }
+
+def timed(fn, rounds):
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+def main(count, rounds):
+    legacy_provider = DefaultJSONProvider(app)
+    with app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+        seed(count)
+
+        def before():
+            deals = deal_query().order_by(Deal.created_at.desc(), Deal.id.desc()).limit(count).all()
+            legacy_provider.dumps({"deals": [legacy_serialize_deal(d) for d in deals]})
+            db.session.expunge_all()
+
+        def after():
+            rows = deal_rows(Deal.query).order_by(Deal.created_at.desc(), Deal.id.desc()).limit(count).all()
+            app.json.dumps({"deals": rows_to_dicts(rows)})
+
+        results = {"before (ORM + stdlib json)": timed(before, rounds),
+                   f"after (tuples + {'orjson' if orjson else 'stdlib json'})": timed(after, rounds)}
+
+    token = jwt.encode({"user_id": 1, "role": "Owner", "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       app.config["SECRET_KEY"], algorithm="HS256")
+    client = app.test_client()
+    url = "/api/deals?limit=500"
+    results[f"GET {url}"] = timed(lambda: client.get(url, headers={"Authorization": f"Bearer {token}"}), rounds)
+
+    print(f"{count} deals")
+    for name, seconds in results.items():
+        print(f"{name:<36} {seconds * 1000:8.2f} ms/op")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
@@ -0,0 +1,378 @@
+"""Seeded load test for the hot API endpoints.
+
+Seeds synthetic users, clients, deals and per-deal stage history, payment
+schedules and action items, then drives each scenario below with a pool of
+concurrent clients and reports p50/p95/p99 latency, throughput, error count
+and SQL statements per request (from the /metrics histograms). Results are
+written as JSON; pass --compare with an earlier file to see the change.
+
+By default requests go through the app in-process (Flask test clients, one
+per thread) against a fresh SQLite file. Point --url at a running server
+(gunicorn, Docker) with the same DATABASE_URL and SECRET_KEY to measure the
+real deployment; --skip-seed reuses data seeded by an earlier run.
+
+    cd crm_backend
+    python benchmarks/load_test.py --scale 1k
+    python benchmarks/load_test.py --scale 100k --concurrency 16 --output before.json
+    python benchmarks/load_test.py --scale 100k --concurrency 16 --compare before.json
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BATCH = 10_000
+PASSWORD = "load-test-password"
+STAGES = ["Lead", "Prospect", "Proposal", "Contract", "Deposit"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="number of deals to seed")
+    parser.add_argument("--deals", type=int, help="exact number of deals (overrides --scale)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="login is CPU-bound by design; run fewer")
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios to run")
+    parser.add_argument("--url", help="base URL of a running server, e.g. http://localhost:5000")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse data already in the database")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<scale>-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and request mix")
+    return parser.parse_args()
+
+# ---------------------------------------------------------------- seeding
+
+def seed(engine, deals, rng):
+    """Bulk-insert a synthetic dataset sized by ``deals``, in batches."""
+    import importlib
+    from sqlalchemy import insert
+    from src.models import User, Client, Deal, StageHistory, PaymentSchedule, ActionItem
+    from src.passwords import hash_password
+
+    reps = max(5, deals // 200)
+    clients = max(10, deals // 4)
+    password_hash = hash_password(PASSWORD)
+    now = datetime.datetime.utcnow()
+    today = datetime.date.today()
+
+    def batches(rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def write(model, rows):
+        for batch in batches(rows):
+            with engine.begin() as connection:
+                connection.execute(insert(model.__table__), batch)
+
+    write(User, ({"name": f"Rep {i}", "email": f"rep{i}@loadtest.example", "password_hash": password_hash,
+                  "role": "Owner" if i == 0 else "SalesRep", "created_at": now, "updated_at": now}
+                 for i in range(reps)))
+    write(Client, ({"company": f"Company {i}", "contact_name": f"Contact {i}", "email": f"contact{i}@client{i}.example",
+                    "phone": "555-0100", "created_at": now, "updated_at": now} for i in range(clients)))
+
+    def deal_rows():
+        for i in range(deals):
+            created = now - datetime.timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86400))
+            closed = rng.random()
+            yield {
+                "client_id": rng.randint(1, clients), "sales_rep_id": rng.randint(1, reps),
+                "stage": rng.choice(STAGES), "estimated_value": f"{rng.randint(1000, 250000)}.00",
+                "probability": round(rng.random(), 2), "created_at": created, "updated_at": created,
+                "expected_close": today + datetime.timedelta(days=rng.randint(-60, 365)),
+                "won_on": today - datetime.timedelta(days=rng.randint(0, 365)) if closed < 0.15 else None,
+                "lost_on": today - datetime.timedelta(days=rng.randint(0, 365)) if 0.15 <= closed < 0.25 else None,
+            }
+    write(Deal, deal_rows())
+
+    def history_rows():
+        for deal_id in range(1, deals + 1):
+            entered = now - datetime.timedelta(days=rng.randint(30, 400))
+            moved = entered + datetime.timedelta(days=rng.randint(1, 29), seconds=rng.randint(0, 86400))
+            first, second = rng.sample(STAGES, 2)
+            yield {"deal_id": deal_id, "stage": first, "entered_at": entered, "exited_at": moved}
+            yield {"deal_id": deal_id, "stage": second, "entered_at": moved, "exited_at": None}
+    write(StageHistory, history_rows())
+
+    def schedule_rows():
+        for deal_id in range(1, deals + 1):
+            for milestone in ("Deposit", "Final payment"):
+                paid = rng.random() < 0.4
+                due = today + datetime.timedelta(days=rng.randint(-180, 180))
+                yield {"deal_id": deal_id, "milestone_name": milestone, "amount_due": f"{rng.randint(500, 50000)}.00",
+                       "due_date": due, "status": "paid" if paid else "pending", "paid_on": due if paid else None,
+                       "created_at": now, "updated_at": now}
+    write(PaymentSchedule, schedule_rows())
+
+    def action_item_rows():
+        for deal_id in range(1, deals + 1):
+            for n in range(2):
+                done = rng.random() < 0.5
+                yield {"deal_id": deal_id, "description": f"Follow up on proposal {deal_id}-{n}",
+                       "owner_id": rng.randint(1, reps), "due_date": today + datetime.timedelta(days=rng.randint(-30, 60)),
+                       "completed_at": now if done else None, "created_at": now, "updated_at": now}
+    write(ActionItem, action_item_rows())
+
+    # Bulk inserts skip record_stage_exits; build the rollup the way the migration does
+    stage_transitions = importlib.import_module("src.migrations.0006_stage_transitions")
+    with engine.begin() as connection:
+        stage_transitions.backfill(connection)
+    return {"users": reps, "clients": clients, "deals": deals}
+
+# ---------------------------------------------------------------- clients
+
+class InProcessClient:
+    """Calls the WSGI app directly; one Flask test client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.local.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+class HTTPClient:
+    """Keep-alive HTTP connection per thread to a running server."""
+
+    def __init__(self, base_url):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parsed.netloc
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        reused = hasattr(self.local, "connection")
+        if not reused:
+            self.local.connection = self.connection_class(self.netloc, timeout=60)
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.local.connection.request(method, path, body=payload, headers=headers)
+            response = self.local.connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            del self.local.connection  # reconnect on the next request
+            if reused:
+                # The server may have closed an idle keep-alive connection; retry once on a fresh one
+                return self.request(method, path, body=body, token=token)
+            raise
+
+# ---------------------------------------------------------------- scenarios
+
+def scenarios(counts, tokens, rng_seed):
+    deals, reps = counts["deals"], counts["users"]
+    local = threading.local()
+
+    def rng():
+        if not hasattr(local, "rng"):
+            local.rng = random.Random(f"{rng_seed}-{threading.get_ident()}")
+        return local.rng
+
+    def deal_id():
+        return rng().randint(1, deals)
+
+    # name -> (metrics endpoint label, request factory returning (method, path, body, token))
+    return {
+        "list_deals": ("/api/deals", lambda: ("GET", "/api/deals?limit=100", None, tokens["owner"])),
+        "list_deals_rep": ("/api/deals", lambda: ("GET", "/api/deals?limit=100", None, tokens["rep"])),
+        "list_deals_filtered": ("/api/deals", lambda: (
+            "GET", f"/api/deals?limit=100&stage={rng().choice(STAGES)}", None, tokens["owner"])),
+        "get_deal": ("/api/deals/<int:deal_id>", lambda: ("GET", f"/api/deals/{deal_id()}", None, tokens["owner"])),
+        "update_deal": ("/api/deals/<int:deal_id>", lambda: (
+            "PUT", f"/api/deals/{deal_id()}", {"probability": round(rng().random(), 2)}, tokens["owner"])),
+        "update_deal_stage": ("/api/deals/<int:deal_id>", lambda: (
+            "PUT", f"/api/deals/{deal_id()}", {"stage": rng().choice(STAGES)}, tokens["owner"])),
+        "deal_payment_schedules": ("/api/deals/<int:deal_id>/payment_schedules", lambda: (
+            "GET", f"/api/deals/{deal_id()}/payment_schedules", None, tokens["owner"])),
+        "deal_stage_history": ("/api/deals/<int:deal_id>/stage_history", lambda: (
+            "GET", f"/api/deals/{deal_id()}/stage_history", None, tokens["owner"])),
+        "deal_action_items": ("/api/deals/<int:deal_id>/action_items", lambda: (
+            "GET", f"/api/deals/{deal_id()}/action_items", None, tokens["owner"])),
+        "deal_full": ("/api/deals/<int:deal_id>/full", lambda: (
+            "GET", f"/api/deals/{deal_id()}/full", None, tokens["owner"])),
+        "stats": ("/api/stats", lambda: ("GET", "/api/stats", None, tokens["owner"])),
+        "search": ("/api/search", lambda: (
+            "GET", f"/api/search?q={rng().choice(['company', 'contact', 'follow', 'proposal'])}", None, tokens["owner"])),
+        "login": ("/api/auth/login", lambda: (
+            "POST", "/api/auth/login", {"email": f"rep{rng().randint(0, reps - 1)}@loadtest.example",
+                                        "password": PASSWORD}, None)),
+    }
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))  # nearest rank, ceil(n * p / 100)
+    return sorted_values[int(rank) - 1]
+
+def scrape_statements(client, endpoint, metrics_token):
+    """(sum, count) of db_statements_per_request for ``endpoint`` from /metrics."""
+    status, body = client.request("GET", "/metrics", token=metrics_token)
+    if status != 200:
+        return None
+    values = {}
+    for line in body.decode().splitlines():
+        for kind in ("sum", "count"):
+            if line.startswith(f"db_statements_per_request_{kind}{{") and f'endpoint="{endpoint}"' in line:
+                values[kind] = values.get(kind, 0) + float(line.rsplit(" ", 1)[1])
+    return values.get("sum", 0.0), values.get("count", 0.0)
+
+def run_scenario(client, endpoint, make_request, total, concurrency, metrics_token):
+    before = scrape_statements(client, endpoint, metrics_token)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        method, path, body, token = make_request()
+        started = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, body=body, token=token)
+            failed = status >= 400
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_started
+
+    after = scrape_statements(client, endpoint, metrics_token)
+    queries = None
+    if before and after and after[1] > before[1]:
+        queries = round((after[0] - before[0]) / (after[1] - before[1]), 2)
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]),
+        "queries_per_request": queries,
+    }
+
+# ---------------------------------------------------------------- reporting
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+def print_table(results, baseline=None):
+    header = f"{'scenario':<24}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(f"{name:<24}{r['throughput_rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['queries_per_request'] if r['queries_per_request'] is not None else '-':>9}{r['errors']:>8}")
+        old = (baseline or {}).get(name)
+        if old:
+            change = lambda new, prev: f"{(new - prev) / prev * 100:+.1f}%" if prev else "n/a"
+            print(f"{'  vs baseline':<24}{change(r['throughput_rps'], old['throughput_rps']):>9}"
+                  f"{change(r['p50_ms'], old['p50_ms']):>10}{change(r['p95_ms'], old['p95_ms']):>10}"
+                  f"{change(r['p99_ms'], old['p99_ms']):>10}")
+
+def main():
+    args = parse_args()
+    deals = args.deals or SCALES[args.scale]
+    if not args.url:
+        os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "loadtest.db"))
+    os.environ.setdefault("OUTBOX_DISPATCHER", "off")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "off")  # measure the endpoints, not the limiter
+    os.environ.setdefault("LOG_LEVEL", "WARNING")  # keep per-request log lines out of the timings
+
+    import jwt
+    from sqlalchemy import func, select
+    from src.main import app
+    from src.migrate import run_migrations
+    from src.models import db, User, Deal
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+        if args.skip_seed:
+            counts = {"deals": db.session.scalar(select(func.count(Deal.id))),
+                      "users": db.session.scalar(select(func.count(User.id)))}
+        else:
+            started = time.perf_counter()
+            counts = seed(db.engine, deals, rng)
+            print(f"Seeded {counts['deals']} deals in {time.perf_counter() - started:.1f}s")
+        dialect = db.engine.dialect.name
+
+    secret = app.config["SECRET_KEY"]
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    tokens = {
+        "owner": jwt.encode({"user_id": 1, "email": "rep0@loadtest.example", "role": "Owner", "exp": expires}, secret, algorithm="HS256"),
+        "rep": jwt.encode({"user_id": 2, "email": "rep1@loadtest.example", "role": "SalesRep", "exp": expires}, secret, algorithm="HS256"),
+    }
+    client = HTTPClient(args.url) if args.url else InProcessClient(app)
+    metrics_token = os.environ.get("METRICS_TOKEN")
+
+    available = scenarios(counts, tokens, args.seed)
+    selected = args.scenarios.split(",") if args.scenarios else list(available)
+    results = {}
+    for name in selected:
+        endpoint, make_request = available[name]
+        total = args.login_requests if name == "login" else args.requests
+        results[name] = run_scenario(client, endpoint, make_request, total, args.concurrency, metrics_token)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scenarios"]
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{args.scale if not args.deals else args.deals}-{datetime.datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+                "target": args.url or "in-process",
+                "database": dialect,
+                "deals": counts["deals"],
+                "concurrency": args.concurrency,
+                "python": platform.python_version(),
+            },
+            "scenarios": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
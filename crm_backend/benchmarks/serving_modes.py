@@ -0,0 +1,150 @@
+"""Compare the sync WSGI deployment with the async ASGI entry point.
+
+Seeds a database once (see load_test.py), then starts each server in turn as
+a single process on the same data and drives the read endpoints at every
+--levels concurrency with load_test's keep-alive HTTP clients:
+
+    sync   gunicorn gthread, one worker with GUNICORN_THREADS threads (the
+           Procfile deployment, per worker process)
+    async  uvicorn src.asgi:app, one process
+
+Comparing one process of each shows how many in-flight requests a process
+can absorb; scale both by WEB_CONCURRENCY in production. Async requests
+beyond the connection pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) wait for a
+connection without holding a thread. Reads against a local SQLite file are
+CPU-bound, so the async mode only pays off when queries wait on the network:
+run it against Postgres (set DATABASE_URL, and ASYNC_DATABASE_URL if needed),
+with the load generator on a different machine or cores than the server.
+
+    cd crm_backend
+    python benchmarks/serving_modes.py --scale 1k --levels 16,64,256
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import SCALES, HTTPClient, scenarios, run_scenario, seed, git_commit
+
+READ_SCENARIOS = ["list_deals", "deal_full", "deal_payment_schedules", "stats", "search"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="number of deals to seed")
+    parser.add_argument("--deals", type=int, help="exact number of deals (overrides --scale)")
+    parser.add_argument("--levels", default="16,64,256", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario and level")
+    parser.add_argument("--scenarios", default=",".join(READ_SCENARIOS), help="comma-separated scenarios")
+    parser.add_argument("--modes", default="sync,async", help="comma-separated subset of sync,async")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("GUNICORN_THREADS", 4)),
+                        help="gunicorn threads for the sync mode")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--output", help="results file (default benchmarks/results/serving-<timestamp>.json)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and request mix")
+    return parser.parse_args()
+
+def server_command(mode, port, threads):
+    if mode == "sync":
+        return ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", "1", "--threads", str(threads),
+                "--timeout", "120", "src.main:app"]
+    return ["uvicorn", "src.asgi:app", "--host", "127.0.0.1", "--port", str(port), "--no-access-log"]
+
+def wait_until_healthy(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+def main():
+    args = parse_args()
+    deals = args.deals or SCALES[args.scale]
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "serving.db"))
+    os.environ.setdefault("OUTBOX_DISPATCHER", "off")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "off")  # measure the endpoints, not the limiter
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    levels = [int(level) for level in args.levels.split(",")]
+
+    import jwt
+    from src.main import app
+    from src.migrate import run_migrations
+    from src.models import db
+
+    with app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+        started = time.perf_counter()
+        counts = seed(db.engine, deals, random.Random(args.seed))
+        print(f"Seeded {counts['deals']} deals in {time.perf_counter() - started:.1f}s")
+        dialect = db.engine.dialect.name
+        db.engine.dispose()
+
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    owner = {"user_id": 1, "email": "rep0@loadtest.example", "role": "Owner", "exp": expires}
+    tokens = {"owner": jwt.encode(owner, app.config["SECRET_KEY"], algorithm="HS256")}
+    available = scenarios(counts, tokens, args.seed)
+    selected = args.scenarios.split(",")
+
+    url = f"http://127.0.0.1:{args.port}"
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for mode in args.modes.split(","):
+        process = subprocess.Popen(server_command(mode, args.port, args.threads), cwd=backend,
+                                   env=dict(os.environ, SECRET_KEY=app.config["SECRET_KEY"]),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_healthy(url, process)
+            for level in levels:
+                client = HTTPClient(url)  # fresh keep-alive connections per level
+                for name in selected:
+                    endpoint, make_request = available[name]
+                    result = run_scenario(client, endpoint, make_request, args.requests, level, None)
+                    results.setdefault(name, {}).setdefault(str(level), {})[mode] = result
+                    print(f"{mode:<6}{level:>5}  {name:<24}{result['throughput_rps']:>9} rps"
+                          f"{result['p50_ms']:>10} p50{result['p99_ms']:>10} p99{result['errors']:>6} errors")
+        finally:
+            process.terminate()
+            process.wait()
+
+    print()
+    header = f"{'scenario':<24}{'clients':>8}{'sync rps':>10}{'async rps':>11}{'sync p99':>10}{'async p99':>11}"
+    print(header)
+    print("-" * len(header))
+    for name, by_level in results.items():
+        for level, by_mode in by_level.items():
+            sync, asynchronous = by_mode.get("sync", {}), by_mode.get("async", {})
+            print(f"{name:<24}{level:>8}{sync.get('throughput_rps', '-'):>10}{asynchronous.get('throughput_rps', '-'):>11}"
+                  f"{sync.get('p99_ms', '-'):>10}{asynchronous.get('p99_ms', '-'):>11}")
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"serving-{datetime.datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+                "database": dialect,
+                "deals": counts["deals"],
+                "sync_threads": args.threads,
+                "python": platform.python_version(),
+            },
+            "scenarios": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Upkeep of the stage_transitions rollup behind /api/analytics.
+
+Each time a deal leaves a stage, ``record_stage_exits`` writes the finished
+interval to stage_transitions in the same transaction, so the reports only
+aggregate that table. History recorded before the rollup existed is
+backfilled by migration 0006_stage_transitions.
+"""
+from sqlalchemy import insert
+from src.models import StageTransition
+
+def _transition_row(history_id, deal_id, sales_rep_id, stage, next_stage, entered_at, exited_at):
+    return {
+        "id": history_id,
+        "deal_id": deal_id,
+        "sales_rep_id": sales_rep_id,
+        "stage": stage,
+        "next_stage": next_stage,
+        "entered_at": entered_at,
+        "exited_at": exited_at,
+        "duration_seconds": max((exited_at - entered_at).total_seconds(), 0.0),
+    }
+
+def record_stage_exits(session, exits):
+    """Roll up StageHistory rows closed on this transaction.
+
+    ``exits`` is a list of ``(history, next_stage, sales_rep_id)``; each
+    history must already have its ``exited_at`` set.
+    """
+    rows = [
+        _transition_row(history.id, history.deal_id, sales_rep_id, history.stage, next_stage,
+                        history.entered_at or history.exited_at, history.exited_at)
+        for history, next_stage, sales_rep_id in exits
+    ]
+    if rows:
+        session.connection().execute(insert(StageTransition.__table__), rows)
@@ -0,0 +1,119 @@
+"""Move closed deals out of the working set into the archive tables.
+
+A deal won or lost more than ARCHIVE_AFTER_DAYS ago is moved, with its
+payment schedules, stage history and action items, into the ``archived_*``
+tables by ``Archiver`` in background batches. Each batch is one transaction
+(INSERT ... SELECT into the archive, then DELETE from the hot table), so a
+deal is always in exactly one of the two. Deals with a pending payment or an
+open action item stay hot until those are settled, so receivables and the
+action list never need the archive. stage_transitions rows are left in place,
+so /api/analytics covers archived deals without reading the archive.
+
+The hot tables then only hold open and recently closed deals, which keeps
+the default list, search and stats queries small. Archived deals are read
+through ``?include_archived=true`` on the deal endpoints and are counted by
+/api/stats. Sync clients see each archived row as deleted in /api/changes.
+
+Run the archiver in-process (ARCHIVER=thread, the default when
+ARCHIVE_AFTER_DAYS is set) or as its own process. SKIP LOCKED keeps
+concurrent archivers apart on Postgres only; on SQLite every worker would
+pick the same deals, so a multi-worker SQLite deployment only archives from
+its own process:
+
+    python -m src.archive
+"""
+import datetime
+import os
+import threading
+from sqlalchemy import delete, func, insert, literal, select
+
+from src.models import db, Deal, PaymentSchedule, ActionItem, ARCHIVES
+from src.change_tracking import TRACKED, record_changes
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+class Archiver:
+    def __init__(self, app, after_days, batch_size=500, interval=3600):
+        self.app = app
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def candidates(self):
+        """Ids of the next batch of closed deals to archive, locked for this transaction."""
+        cutoff = datetime.date.today() - datetime.timedelta(days=self.after_days)
+        query = (db.session.query(Deal.id)
+                 .filter(func.coalesce(Deal.won_on, Deal.lost_on) < cutoff)
+                 .filter(~PaymentSchedule.query.filter(PaymentSchedule.deal_id == Deal.id,
+                                                        PaymentSchedule.status == 'pending').exists())
+                 .filter(~ActionItem.query.filter(ActionItem.deal_id == Deal.id,
+                                                  ActionItem.completed_at.is_(None)).exists()))
+        return [deal_id for deal_id, in query.order_by(Deal.id).limit(self.batch_size).with_for_update(skip_locked=True)]
+
+    def archive_batch(self):
+        """Archive one batch of deals; returns the number of deals moved."""
+        deal_ids = self.candidates()
+        if not deal_ids:
+            db.session.rollback()
+            return 0
+        now = datetime.datetime.utcnow()
+        reps = dict(db.session.execute(select(Deal.id, Deal.sales_rep_id).where(Deal.id.in_(deal_ids))).all())
+        for model, archive in ARCHIVES.items():
+            key = model.id if model is Deal else model.deal_id
+            columns = [column.name for column in model.__table__.columns]
+            selected = select(*[model.__table__.c[name] for name in columns], literal(now).label("archived_at")).where(key.in_(deal_ids))
+            db.session.execute(insert(archive).from_select(columns + ["archived_at"], selected))
+            # ORM-enabled DELETE, so the stats and summary caches watching these models are invalidated
+            moved = db.session.execute(delete(model).where(key.in_(deal_ids)).returning(model.id, key),
+                                       execution_options={"synchronize_session": False}).all()
+            record_changes(db.session, TRACKED[model], [row_id for row_id, _ in moved], operation="archive",
+                           owners={row_id: reps[deal_id] for row_id, deal_id in moved})
+        db.session.commit()
+        log.info("archive.batch", extra={"deals": len(deal_ids), "after_days": self.after_days})
+        return len(deal_ids)
+
+    def run_once(self):
+        """Archive everything currently eligible; returns the number of deals moved."""
+        total = 0
+        with self.app.app_context():
+            while not self._stop.is_set():
+                moved = self.archive_batch()
+                total += moved
+                if moved < self.batch_size:
+                    break
+        return total
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                log.exception("archive.cycle_failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        threading.Thread(target=self.run_forever, name="archiver", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def archiver_from_env(app):
+    after_days = os.environ.get("ARCHIVE_AFTER_DAYS")
+    if not after_days:
+        return None
+    return Archiver(
+        app, int(after_days),
+        batch_size=int(os.environ.get("ARCHIVE_BATCH_SIZE", 500)),
+        interval=int(os.environ.get("ARCHIVE_INTERVAL", 3600)),
+    )
+
+if __name__ == "__main__":
+    os.environ["ARCHIVER"] = "off"  # this process is the archiver
+    from src.main import app
+    archiver = archiver_from_env(app)
+    if archiver is None:
+        raise SystemExit("ARCHIVE_AFTER_DAYS is not set")
+    archiver.run_forever()
@@ -0,0 +1,130 @@
+"""Opt-in ASGI entry point with async database I/O for the read endpoints.
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port 5000
+
+Requires the uvicorn, asgiref and aiosqlite (SQLite) or asyncpg (Postgres)
+packages. GET requests to the endpoints in ``ASYNC_ENDPOINTS`` run the
+ordinary Flask view on the event loop, inside ``AsyncSession.run_sync``:
+``db.session`` is bound to the AsyncSession's synchronous facade for the
+request, so every query the view (and its auth, metrics and compression
+hooks) issues awaits the asyncio driver instead of blocking. One process can
+therefore keep hundreds of these requests in flight, bounded by the
+connection pool rather than a thread count.
+
+Everything else, including every write, is handed to the unchanged WSGI app
+on asgiref's thread pool, with the synchronous engine and its transactional
+semantics. Views listed here must not block outside the database (no
+password hashing or outbound HTTP), since that would stall the event loop.
+"""
+import io
+import os
+import sys
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import AsyncSession
+from werkzeug.exceptions import HTTPException
+
+# The per-route in-flight cap is sized for gthread workers; here the async
+# reads are bounded by the connection pool instead
+os.environ.setdefault("RATE_LIMIT_CONCURRENCY", "0")
+
+from src.main import app as flask_app
+from src.models import db
+from src.database import create_async_engine_from_env
+
+ASYNC_ENDPOINTS = {
+    "deal_bp.get_deals",
+    "deal_bp.get_deal",
+    "deal_bp.get_deal_full",
+    "payment_schedule_bp.get_payment_schedules_for_deal",
+    "stage_history_bp.get_stage_history_for_deal",
+    "action_item_bp.get_action_items_for_deal",
+    "stats_bp.get_stats",
+    "search_bp.search",
+}
+
+def wsgi_environ(scope):
+    """A WSGI environ for a bodiless ASGI HTTP request (GET or HEAD)."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+class AsyncReadApp:
+    def __init__(self, wsgi_app, engine):
+        self.wsgi_app = wsgi_app
+        self.engine = engine
+        self.fallback = WsgiToAsgi(wsgi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            # GETs carry no body, so the environ can be built up front
+            environ = wsgi_environ(scope)
+            if self.endpoint(environ) in ASYNC_ENDPOINTS:
+                response = await self.dispatch(environ)
+                return await self.respond(response, scope, send)
+        return await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def endpoint(self, environ):
+        try:
+            endpoint, _ = self.wsgi_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None
+        return endpoint
+
+    async def dispatch(self, environ):
+        async with AsyncSession(self.engine) as session:
+            with self.wsgi_app.request_context(environ):
+                # Bind db.session (scoped to this app context) to the request's AsyncSession
+                db.session.registry.set(session.sync_session)
+                try:
+                    return await session.run_sync(lambda _: self.full_dispatch())
+                finally:
+                    db.session.registry.clear()
+
+    def full_dispatch(self):
+        try:
+            return self.wsgi_app.full_dispatch_request()
+        except Exception as e:
+            return self.wsgi_app.handle_exception(e)
+
+    async def respond(self, response, scope, send):
+        body = b"" if scope["method"] == "HEAD" else response.get_data()
+        headers = [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in response.headers.items()]
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        response.close()
+
+app = AsyncReadApp(flask_app, create_async_engine_from_env())
@@ -0,0 +1,102 @@
+from flask import request, jsonify, current_app, g
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import os
+import threading
+import time
+import jwt
+
+class TokenCache:
+    """Bounded LRU of verified JWT payloads, keyed by a digest of the token.
+
+    A hit skips the HS256 signature check and claim validation; entries are
+    dropped once the token's ``exp`` passes, so an expired token is never
+    served from the cache.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key, payload):
+        if self.maxsize <= 0 or "exp" not in payload:
+            return
+        with self._lock:
+            self._entries[key] = (payload, payload["exp"])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache(maxsize=int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 1024)))
+
+def decode_token(token):
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        token_cache.put(key, payload)
+    return payload
+
+# Helper to decode JWT and get user info
+def get_jwt_identity():
+    if "user" in g:
+        return g.user
+    auth_header = request.headers.get('Authorization', None)
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    token = auth_header.split(' ')[1]
+    try:
+        return decode_token(token)
+    except Exception:
+        return None
+
+def jwt_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user = get_jwt_identity()
+        if not user:
+            return jsonify({'message': 'Missing or invalid token'}), 401
+        return f(user, *args, **kwargs)
+    return decorated
+
+# Mark a view as reachable without a token (login, signup)
+def public(f):
+    f.is_public = True
+    return f
+
+def _require_token():
+    if request.method == 'OPTIONS':
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    if view is None or getattr(view, 'is_public', False):
+        return None
+    user = get_jwt_identity()
+    if not user:
+        return jsonify({'message': 'Missing or invalid token'}), 401
+    g.user = user
+
+def protect(blueprint):
+    """Require a valid bearer token on every route of ``blueprint``.
+
+    Must be called before the blueprint is registered on the app.
+    """
+    blueprint.before_request(_require_token)
+    return blueprint
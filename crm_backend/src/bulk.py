@@ -0,0 +1,97 @@
+from flask import request, jsonify
+from src.models import db
+import datetime
+from decimal import Decimal, InvalidOperation
+
+MAX_BULK_ROWS = 1000
+
+# Pull the list of rows out of a bulk request body, which may be a bare
+# JSON array or an object keyed by the collection name
+def read_bulk_rows(key):
+    data = request.get_json(silent=True)
+    rows = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        return None, (jsonify({"message": f"Expected a non-empty array of {key}"}), 400)
+    if len(rows) > MAX_BULK_ROWS:
+        return None, (jsonify({"message": f"At most {MAX_BULK_ROWS} {key} per request"}), 413)
+    if not all(isinstance(row, dict) for row in rows):
+        return None, (jsonify({"message": f"Every entry in {key} must be an object"}), 400)
+    return rows, None
+
+# One IN query per referenced table instead of one .get() per row
+def existing_ids(column, ids):
+    ids = set(ids)
+    if not ids:
+        return set()
+    return {row[0] for row in db.session.query(column).filter(column.in_(ids))}
+
+def load_by_id(model, ids):
+    ids = set(ids)
+    if not ids:
+        return {}
+    return {obj.id: obj for obj in model.query.filter(model.id.in_(ids))}
+
+# Field converters used when validating bulk rows; each raises ValueError
+def to_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    return int(value)
+
+def to_decimal(value):
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError
+
+def to_date(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+def to_datetime(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def parse_fields(row, converters, required=()):
+    """Convert the fields of ``row`` present in ``converters``.
+
+    Raises ValueError naming the first missing or malformed field.
+    """
+    missing = [field for field in required if field not in row]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    values = {}
+    for field, convert in converters.items():
+        if field in row:
+            try:
+                values[field] = convert(row[field])
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid value for {field}")
+    return values
+
+def row_result(index, status, **extra):
+    return dict(index=index, status=status, **extra)
+
+def reject_duplicate_ids(parsed, results):
+    """Fail every update row whose id already appeared earlier in the request.
+
+    Applying two rows to one record in a single pass would let the second
+    silently overwrite the first (and its stage history), so only the first
+    is processed.
+    """
+    seen = set()
+    for index, values in list(parsed.items()):
+        if "id" not in values:
+            continue
+        if values["id"] in seen:
+            del parsed[index]
+            results[index] = row_result(index, "error", message=f"Duplicate id {values['id']} in request")
+        seen.add(values["id"])
+
+# 200 when every row succeeded, 207 for partial failure, 400 when nothing did
+def bulk_response(results):
+    failed = sum(1 for r in results if r["status"] == "error")
+    code = 200 if not failed else (400 if failed == len(results) else 207)
+    return jsonify({
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "updated": sum(1 for r in results if r["status"] == "updated"),
+        "failed": failed,
+        "results": results,
+    }), code
@@ -0,0 +1,78 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+class SummaryCache:
+    """A single cached value, recomputed on demand after invalidation.
+
+    Invalidation is driven by ORM writes to ``models`` (see ``watch``), so a
+    summary is only rebuilt after something it depends on actually changed.
+    Writes made by other worker processes are not observed, so ``ttl`` bounds
+    how stale a cached value can get in a multi-worker deployment.
+    """
+
+    def __init__(self, name, ttl=60):
+        self.name = name
+        self.ttl = ttl
+        self._value = None
+        self._computed_at = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, compute):
+        # ``compute`` runs outside the lock: under the ASGI entry point it
+        # awaits the database on the event loop thread, where a second request
+        # blocking on a held lock would deadlock the loop. Concurrent misses may
+        # each compute; a result is only stored if no invalidation raced it.
+        with self._lock:
+            if self._computed_at is not None and time.monotonic() - self._computed_at <= self.ttl:
+                return self._value
+            generation = self._generation
+        value = compute()
+        with self._lock:
+            if self._generation == generation:
+                self._value = value
+                self._computed_at = time.monotonic()
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._computed_at = None
+            self._generation += 1
+
+_watchers = []
+
+def watch(cache, *models):
+    """Invalidate ``cache`` whenever a transaction touching ``models`` commits."""
+    _watchers.append((cache, models))
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_caches(session, flush_context):
+    touched = set(type(obj) for obj in list(session.new) + list(session.dirty) + list(session.deleted))
+    dirty = session.info.setdefault("dirty_caches", set())
+    for cache, models in _watchers:
+        if touched.intersection(models):
+            dirty.add(cache)
+
+# Bulk statements such as session.execute(insert(Deal), rows) bypass the
+# unit of work, so they are caught here instead of in after_flush
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_dirty_caches(orm_execute_state):
+    if orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return
+    model = orm_execute_state.bind_mapper.class_
+    dirty = orm_execute_state.session.info.setdefault("dirty_caches", set())
+    for cache, models in _watchers:
+        if model in models:
+            dirty.add(cache)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dirty_caches(session):
+    for cache in session.info.pop("dirty_caches", ()):
+        cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_caches(session):
+    session.info.pop("dirty_caches", None)
@@ -0,0 +1,84 @@
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.orm import Session
+from src.models import ChangeLog, Deal, PaymentSchedule, ActionItem, StageHistory
+import datetime
+
+# Entity names used in the change log and in the /api/changes response
+TRACKED = {
+    Deal: "deals",
+    PaymentSchedule: "payment_schedules",
+    ActionItem: "action_items",
+    StageHistory: "stage_history",
+}
+
+# Transaction-level advisory lock taken before a transaction's first change
+# log row on Postgres. Sequence values are handed out in insert order, not
+# commit order, so without it a poller could read id 11 from a transaction
+# that committed first and then never see id 10 from one still running.
+# Holding the lock until commit makes the ids commit-ordered. SQLite allows
+# one writer at a time, so its ids are commit-ordered already.
+CHANGE_LOG_LOCK_ID = 72411
+
+def record_changes(session, entity, ids, operation="upsert", owners=None):
+    """Append change log rows on the session's current transaction.
+
+    Flushes are tracked automatically; call this for bulk statements such as
+    session.execute(insert(Deal), rows), which bypass the unit of work.
+    ``owners`` maps ids to the sales_rep_id of their deal; pass it for
+    delete and archive rows so their tombstones reach the right SalesRep.
+    """
+    owners = owners or {}
+    _append(session, {(entity, entity_id): operation for entity_id in ids},
+            {(entity, entity_id): owners.get(entity_id) for entity_id in ids})
+
+def _append(session, changes, owners):
+    now = datetime.datetime.utcnow()
+    rows = [{"entity": entity, "entity_id": entity_id, "operation": operation, "changed_at": now,
+             "sales_rep_id": owners.get((entity, entity_id))}
+            for (entity, entity_id), operation in changes.items()]
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql" and not session.info.get("change_log_locked"):
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": CHANGE_LOG_LOCK_ID})
+        session.info["change_log_locked"] = True
+    connection.execute(insert(ChangeLog.__table__), rows)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_transaction_state(session):
+    session.info.pop("change_log_locked", None)
+    session.info.pop("deleted_owners", None)
+
+def _deal_id(obj):
+    return obj.id if isinstance(obj, Deal) else obj.deal_id
+
+# Deleted rows can no longer be joined to their deal once flushed, so the
+# owning rep is looked up while they still exist
+@event.listens_for(Session, "before_flush")
+def _resolve_deleted_owners(session, flush_context, instances):
+    deleted = [obj for obj in session.deleted if type(obj) in TRACKED]
+    if not deleted:
+        return
+    with session.no_autoflush:
+        reps = dict(session.execute(select(Deal.id, Deal.sales_rep_id)
+                                    .where(Deal.id.in_({_deal_id(obj) for obj in deleted}))).all())
+    owners = session.info.setdefault("deleted_owners", {})
+    for obj in deleted:
+        owners[(TRACKED[type(obj)], obj.id)] = reps.get(_deal_id(obj))
+
+# Written in after_flush so the log rows commit or roll back together with
+# the mutation that caused them
+@event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if type(obj) in TRACKED:
+            changes[(TRACKED[type(obj)], obj.id)] = "upsert"
+    for obj in session.dirty:
+        if type(obj) in TRACKED and session.is_modified(obj, include_collections=False):
+            changes[(TRACKED[type(obj)], obj.id)] = "upsert"
+    for obj in session.deleted:
+        if type(obj) in TRACKED:
+            changes[(TRACKED[type(obj)], obj.id)] = "delete"
+    _append(session, changes, session.info.pop("deleted_owners", {}))
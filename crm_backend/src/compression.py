@@ -0,0 +1,136 @@
+"""Content-Encoding negotiation for API responses and static assets.
+
+``compress_responses(app)`` gzip- or brotli-encodes buffered JSON responses
+of at least COMPRESS_MIN_SIZE bytes when the client's Accept-Encoding
+allows it. ``AssetManifest`` indexes the static folder once at startup,
+with precompressed variants of each text asset, so serving a file is a
+dict lookup and never compresses or touches the disk per request.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency; responses fall back to gzip
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Per-response compression favours speed; static assets are compressed once
+# at startup, so they get the highest settings
+_FAST = {"gzip": lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+         "br": lambda data: brotli.compress(data, quality=5)}
+_BEST = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+         "br": lambda data: brotli.compress(data, quality=11)}
+
+COMPRESSIBLE = re.compile(r"^(text/|application/(json|javascript|xml|manifest\+json|wasm)|image/svg\+xml)")
+
+def negotiate(available=ENCODINGS):
+    """The encoding from ``available`` the client prefers, or None for identity."""
+    return request.accept_encodings.best_match(available)
+
+def _weaken_etag(response):
+    # The encoded body is not byte-identical to the one the strong validator
+    # was computed for; conditional_get compares weakly, so 304s still work
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+def _add_vary(response):
+    response.vary.add("Accept-Encoding")
+
+def compress_responses(app):
+    """Install the after_request hook that compresses JSON responses.
+
+    Register it after ``instrument(app)`` so the size metrics see the
+    encoded body. COMPRESS_MIN_SIZE (bytes, default 1024) is the threshold
+    below which the saving is not worth the CPU.
+    """
+    min_size = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+
+    @app.after_request
+    def compress(response):
+        if (response.is_streamed or response.direct_passthrough or response.status_code < 200
+                or response.status_code in (204, 206, 304) or "Content-Encoding" in response.headers
+                or response.mimetype != "application/json"):
+            return response
+        _add_vary(response)
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        encoding = negotiate()
+        if encoding is None:
+            return response
+        response.set_data(_FAST[encoding](data))
+        response.headers["Content-Encoding"] = encoding
+        _weaken_etag(response)
+        return response
+
+# Build tools put a content hash in the names of files that never change
+# (main-3f2a9c1e.js, Next.js's _next/static/), so those can be cached forever
+FINGERPRINTED = re.compile(r"(^|/)_next/static/|[.-][0-9a-f]{8,}\.[^/]+$")
+
+class Asset:
+    __slots__ = ("body", "mimetype", "etag", "cache_control", "variants")
+
+    def __init__(self, body, mimetype, etag, cache_control, variants):
+        self.body, self.mimetype, self.etag = body, mimetype, etag
+        self.cache_control, self.variants = cache_control, variants
+
+class AssetManifest:
+    """Every file under ``folder``, read, hashed and precompressed once.
+
+    Fingerprinted files are served ``immutable`` for a year; everything else
+    (index.html and friends) must be revalidated, which the content-hash ETag
+    makes a cheap 304. A compressed variant is only kept when it is smaller.
+    """
+
+    def __init__(self, folder):
+        self.assets = {}
+        if folder is None or not os.path.isdir(folder):
+            return
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            for name in files:
+                if name.startswith("."):
+                    continue
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, folder).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    self.assets[path] = self._load(path, f.read())
+
+    @staticmethod
+    def _load(path, body):
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        variants = {}
+        if COMPRESSIBLE.match(mimetype) and len(body) >= 256:
+            for encoding in ENCODINGS:
+                encoded = _BEST[encoding](body)
+                if len(encoded) < len(body):
+                    variants[encoding] = encoded
+        if FINGERPRINTED.search(path):
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "no-cache"
+        return Asset(body, mimetype, hashlib.sha256(body).hexdigest()[:32], cache_control, variants)
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def response(self, app, asset):
+        """A response for ``asset`` in the best encoding the client accepts."""
+        encoding = negotiate(tuple(asset.variants)) if asset.variants else None
+        response = app.response_class(asset.variants[encoding] if encoding else asset.body,
+                                      mimetype=asset.mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if asset.variants:
+            _add_vary(response)
+        # Each encoding is a different byte sequence, hence a different validator
+        response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+        response.headers["Cache-Control"] = asset.cache_control
+        return response.make_conditional(request)
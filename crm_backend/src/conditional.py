@@ -0,0 +1,47 @@
+from flask import request, current_app
+from sqlalchemy import func
+import datetime
+import hashlib
+
+def collection_version(query, updated_column, id_column):
+    """(max(updated_at), row count) for the rows ``query`` selects.
+
+    Inserts and updates move the maximum, deletes change the count, so the
+    pair changes whenever the collection does. With an index on updated_at
+    this is one cheap aggregate rather than a full fetch.
+    """
+    latest, count = query.with_entities(func.max(updated_column), func.count(id_column)).order_by(None).one()
+    return latest, count
+
+def conditional_get(sources, render, scope=()):
+    """Answer a collection GET with 304 when the client's copy is current.
+
+    ``sources`` is a list of ``(query, updated_at column, id column)`` whose
+    versions feed the validators, ``scope`` adds anything else the body
+    depends on (such as the caller's role), and ``render`` builds the full
+    response; it is only called when the client's copy is stale.
+    """
+    versions = [collection_version(*source) for source in sources]
+    digest = hashlib.sha1(repr((
+        request.path, sorted(request.args.items(multi=True)), tuple(scope),
+        [(latest.isoformat() if latest else None, count) for latest, count in versions],
+    )).encode()).hexdigest()
+    etag = digest[:32]
+    last_modified = max((latest for latest, _ in versions if latest), default=None)
+    if last_modified is not None:
+        # updated_at is stored as naive UTC; HTTP dates have one-second resolution
+        last_modified = last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0)
+
+    # Only the ETag decides freshness. A deleted row leaves max(updated_at)
+    # where it was, so If-Modified-Since on its own would answer 304 to a copy
+    # that still lists the row; Last-Modified is informational.
+    # Weak comparison: compressed responses carry the weakened form of the tag
+    fresh = bool(request.if_none_match) and request.if_none_match.contains_weak(etag)
+
+    response = current_app.response_class(status=304) if fresh else render()
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Bodies depend on the caller's token, so only the browser may cache them, and must revalidate
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+DEFAULT_DATABASE_URL = "sqlite:////tmp/crm.db"
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+def database_url():
+    """Resolve the database URL from the environment.
+
+    DATABASE_URL wins; otherwise a Postgres URL is built from the DB_* values
+    in .env.sample when DB_HOST is set, falling back to a local SQLite file.
+    """
+    url = os.environ.get("DATABASE_URL")
+    if url:
+        # Heroku/Railway still hand out the scheme SQLAlchemy 1.4 dropped
+        if url.startswith("postgres://"):
+            url = "postgresql://" + url[len("postgres://"):]
+        return url
+    if os.environ.get("DB_HOST"):
+        return "postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}".format(
+            user=os.environ.get("DB_USERNAME", "crm_user"),
+            password=os.environ.get("DB_PASSWORD", ""),
+            host=os.environ["DB_HOST"],
+            port=os.environ.get("DB_PORT", "5432"),
+            name=os.environ.get("DB_NAME", "crm_db"),
+        )
+    return DEFAULT_DATABASE_URL
+
+def engine_options(url):
+    options = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+    }
+    parsed = make_url(url)
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if not (parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")):
+        options["pool_size"] = _env_int("DB_POOL_SIZE", 5)
+        options["max_overflow"] = _env_int("DB_MAX_OVERFLOW", 10)
+    return options
+
+# The asyncio driver for each synchronous backend, used by the ASGI entry point
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def async_database_url(url):
+    """``url`` with its driver swapped for the asyncio one.
+
+    ASYNC_DATABASE_URL wins, for connection options the asyncio driver
+    spells differently (asyncpg takes ``ssl=`` rather than ``sslmode=``).
+    """
+    if os.environ.get("ASYNC_DATABASE_URL"):
+        return os.environ["ASYNC_DATABASE_URL"]
+    parsed = make_url(url)
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{ASYNC_DRIVERS[parsed.get_backend_name()]}")
+
+def create_async_engine_from_env():
+    """The asyncio engine for the configured database, with the same pool settings."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    url = database_url()
+    options = engine_options(url)
+    if "pool_size" in options:
+        # aiosqlite otherwise defaults to NullPool: a new connection and thread per checkout
+        options["poolclass"] = AsyncAdaptedQueuePool
+    engine = create_async_engine(async_database_url(url), **options)
+    if engine.dialect.name == "sqlite":
+        # aiosqlite's connection is not a sqlite3.Connection, so the class-wide listener skips it
+        event.listen(engine.sync_engine, "connect", lambda dbapi_connection, record: _apply_sqlite_pragmas(dbapi_connection))
+    return engine
+
+def configure_database(app):
+    url = database_url()
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(url)
+
+# WAL lets readers proceed while one worker writes, NORMAL sync is safe under
+# WAL, and the busy timeout makes a second writer wait instead of failing with
+# "database is locked" when several gunicorn workers share the file
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        _apply_sqlite_pragmas(dbapi_connection)
+
+def _apply_sqlite_pragmas(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    cursor.close()
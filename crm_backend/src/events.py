@@ -0,0 +1,158 @@
+"""Live event fan-out for the /api/events stream.
+
+``LocalBroadcaster`` delivers events to subscribers in the same process.
+``RedisBroadcaster`` publishes through a Redis (or compatible) pub/sub channel
+and relays everything received on it to local subscribers, so an event raised
+in one gunicorn worker reaches streams held open by every other worker.
+Select with EVENT_BACKEND=local|redis|off (and REDIS_URL).
+
+Each open stream holds a gthread thread for up to SSE_MAX_DURATION seconds,
+idle but for keepalives. The start commands run each worker with
+GUNICORN_THREADS + SSE_THREADS threads, and a worker accepts at most
+SSE_THREADS streams, so streams never take the GUNICORN_THREADS that serve
+ordinary requests. ``local`` only reaches streams on the publishing worker,
+so it refuses to start with WEB_CONCURRENCY > 1. Left unset, the backend is
+``redis`` when REDIS_URL is set, ``local`` for a single worker, and otherwise
+``off`` with a startup warning: /api/events answers 503 and nothing is sent.
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from src.serializers import dumps
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+class SubscriberLimitReached(Exception):
+    """Raised when a process already holds its maximum number of streams."""
+
+class StreamsDisabled(Exception):
+    """Raised when live events are turned off (EVENT_BACKEND=off)."""
+
+class Subscription:
+    def __init__(self, broadcaster, maxsize):
+        self._broadcaster = broadcaster
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            pass  # a stalled client drops events rather than blocking publishers
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+class LocalBroadcaster:
+    def __init__(self, max_subscribers=2, queue_size=100):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SubscriberLimitReached()
+            subscription = Subscription(self, self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        self._fan_out(event)
+
+    def _fan_out(self, event):
+        event = dict(event, id=next(self._ids))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+class RedisBroadcaster(LocalBroadcaster):
+    channel = "crm:events"
+
+    def __init__(self, url, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENT_BACKEND=redis requires the 'redis' package")
+        self._redis = redis.Redis.from_url(url)
+        threading.Thread(target=self._relay, name="event-relay", daemon=True).start()
+
+    def publish(self, event):
+        self._redis.publish(self.channel, dumps(event))
+
+    def _relay(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._fan_out(json.loads(message["data"]))
+            except Exception:
+                time.sleep(1)  # connection lost; resubscribe
+
+class NullBroadcaster:
+    def subscribe(self):
+        raise StreamsDisabled()
+
+    def publish(self, event):
+        pass
+
+def max_subscribers_from_env():
+    """Streams per worker: SSE_MAX_SUBSCRIBERS, at most the SSE_THREADS set aside for them."""
+    threads = int(os.environ.get("SSE_THREADS", 8))
+    configured = int(os.environ.get("SSE_MAX_SUBSCRIBERS", threads))
+    if configured > threads:
+        log.warning("event.subscriber_limit_capped", extra={"configured": configured, "limit": threads})
+    return max(1, min(configured, threads))
+
+def create_broadcaster():
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    backend = os.environ.get("EVENT_BACKEND")
+    if not backend:
+        backend = "redis" if os.environ.get("REDIS_URL") else "local" if workers <= 1 else "off"
+        if backend == "off":
+            log.warning("event.streams_disabled", extra={
+                "workers": workers, "reason": "live events need REDIS_URL (or EVENT_BACKEND=redis) with WEB_CONCURRENCY > 1"})
+    if backend == "off":
+        return NullBroadcaster()
+    if backend == "local" and workers > 1:
+        raise RuntimeError(f"EVENT_BACKEND=local only reaches streams on one worker, but WEB_CONCURRENCY={workers}; "
+                           "set EVENT_BACKEND=redis (with REDIS_URL) or EVENT_BACKEND=off")
+    options = {
+        "max_subscribers": max_subscribers_from_env(),
+        "queue_size": int(os.environ.get("SSE_QUEUE_SIZE", 100)),
+    }
+    if backend == "redis":
+        return RedisBroadcaster(os.environ.get("REDIS_URL", "redis://localhost:6379/0"), **options)
+    return LocalBroadcaster(**options)
+
+broadcaster = create_broadcaster()
+
+def publish(event_type, sales_rep_id, **data):
+    """Broadcast an event; ``sales_rep_id`` is the owning deal's rep, used for scoping."""
+    try:
+        broadcaster.publish(dict(data, type=event_type, sales_rep_id=sales_rep_id))
+    except Exception as e:
+        # Live updates are best-effort; the write has already committed
+        log.error("event.publish_failed", extra={"error": str(e), "event_type": event_type})
+
+def visible_to(event, user):
+    return user['role'] in ['Admin', 'Owner'] or event.get('sales_rep_id') == user['user_id']
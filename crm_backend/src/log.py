@@ -0,0 +1,55 @@
+"""Structured, leveled and sampled logging.
+
+Every record is written to stderr as one JSON object: timestamp, level,
+logger, message and any ``extra={...}`` fields. LOG_LEVEL sets the minimum
+level (default INFO). LOG_SAMPLE_RATE (0-1, default 1) keeps only that
+fraction of DEBUG and INFO records, such as the per-request log line;
+warnings and errors are always written.
+"""
+import datetime
+import json
+import logging
+import os
+import random
+import sys
+
+from src.serializers import dumps
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _STANDARD)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        try:
+            return dumps(entry)
+        except TypeError:
+            return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+def configure_logging():
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(SamplingFilter(float(os.environ.get("LOG_SAMPLE_RATE", 1))))
+    root = logging.getLogger("src")
+    root.handlers[:] = [handler]
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+
+def get_logger(name):
+    return logging.getLogger(name)
@@ -6,11 +6,20 @@ _src_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _src_parent not in sys.path:
     sys.path.insert(0, _src_parent)
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, jsonify
 from flask_cors import CORS
 from src.models import db
+from src.database import configure_database
+from src.serializers import FastJSONProvider
+from src.log import configure_logging, get_logger
+from werkzeug.exceptions import HTTPException
+
+# JSON log lines on stderr; LOG_LEVEL and LOG_SAMPLE_RATE tune the volume
+configure_logging()
+log = get_logger(__name__)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT') # Change this in production!
 
 CORS(app, supports_credentials=True, origins=[
@@ -18,63 +27,126 @@ CORS(app, supports_credentials=True, origins=[
     "http://localhost:3000"  # (optional, for local dev)
 ])
 
-# Database configuration using SQLite — use /tmp so it's always writable in any container
-app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/crm.db"
+# Database URL and pool settings come from the environment (see .env.sample);
+# without any, a SQLite file in /tmp is used so the app always boots
+configure_database(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Upper bound (seconds) on how stale /api/stats can be when another worker wrote the data
+app.config['STATS_CACHE_TTL'] = int(os.environ.get('STATS_CACHE_TTL', 60))
+# werkzeug KDF spec for new password hashes, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000";
+# existing hashes are upgraded on the user's next successful login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+# Seconds before an /api/events stream is closed so its thread is recycled; clients reconnect
+app.config['SSE_MAX_DURATION'] = int(os.environ.get('SSE_MAX_DURATION', 300))
+# Matches per entity type ranked by /api/search (the most recently created ones)
+app.config['SEARCH_CANDIDATES'] = int(os.environ.get('SEARCH_CANDIDATES', 500))
 
 db.init_app(app)
 
-with app.app_context():
-    from src.models import Client, User, Deal, PaymentSchedule, StageHistory, ActionItem
-    db.create_all()
+# The schema is managed by versioned migrations (src/migrations), applied once
+# per deploy with `python -m src.migrate` before the workers start.
 
-# Import blueprints after db is initialized and tables are created
+# Import blueprints after db is initialized
 from src.routes.client import client_bp
 from src.routes.user import user_bp
 from src.routes.deal import deal_bp
 from src.routes.payment_schedule import payment_schedule_bp
 from src.routes.stage_history import stage_history_bp
 from src.routes.action_item import action_item_bp
+from src.routes.stats import stats_bp
+from src.routes.export import export_bp
+from src.routes.changes import changes_bp
+from src.routes.events import events_bp
+from src.routes.analytics import analytics_bp
+from src.routes.receivables import receivables_bp
+from src.routes.search import search_bp
+from src.auth import protect
+
+# Every /api blueprint requires a bearer token except views marked @public
+for blueprint in [client_bp, user_bp, deal_bp, payment_schedule_bp, stage_history_bp,
+                  action_item_bp, stats_bp, export_bp, changes_bp, events_bp, analytics_bp,
+                  receivables_bp, search_bp]:
+    app.register_blueprint(protect(blueprint), url_prefix='/api')
+
+# Per-endpoint latency, SQL and response-size metrics, served on /metrics
+from src.metrics import instrument
+instrument(app)
+
+# gzip/brotli-encode JSON responses of COMPRESS_MIN_SIZE bytes or more
+# (registered after instrument so the size metrics see the encoded body)
+from src.compression import compress_responses
+compress_responses(app)
 
-app.register_blueprint(client_bp, url_prefix='/api')
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(deal_bp, url_prefix='/api')
-app.register_blueprint(payment_schedule_bp, url_prefix='/api')
-app.register_blueprint(stage_history_bp, url_prefix='/api')
-app.register_blueprint(action_item_bp, url_prefix='/api')
+# Per-user token buckets and per-route in-flight caps (RATE_LIMIT_* in .env.sample).
+# App-level hooks run before the blueprints' auth check and views; registered
+# after instrument so refused requests are still timed and counted.
+from src.ratelimit import limit
+limit(app)
+
+# Deliver outbox webhooks from a background thread in each worker. Each claim
+# is a conditional UPDATE that only one worker can win for a given event, on
+# SQLite as well as Postgres, so workers never send the same event
+# concurrently (delivery is still at-least-once across crashes). Set
+# OUTBOX_DISPATCHER=off to run `python -m src.outbox` as a separate process instead.
+from src.outbox import dispatcher_from_env
+if os.environ.get('OUTBOX_DISPATCHER', 'thread') == 'thread':
+    outbox_dispatcher = dispatcher_from_env(app)
+    if outbox_dispatcher is not None:
+        outbox_dispatcher.start()
+
+# Move long-closed deals into the archive tables in background batches
+# (ARCHIVE_* in .env.sample). On Postgres batches lock their deals with SKIP
+# LOCKED, so several workers archiving at once do not collide. SQLite has no
+# row locks and every worker would pick the same deals, so there only a
+# single-worker deployment archives in-process; otherwise run
+# `python -m src.archive` as a separate process. ARCHIVER=off disables the thread.
+from src.archive import archiver_from_env
+if os.environ.get('ARCHIVER', 'thread') == 'thread':
+    archiver = archiver_from_env(app)
+    shared_sqlite = app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite') and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1
+    if archiver is not None and shared_sqlite:
+        log.warning("archive.thread_skipped", extra={"reason": "SQLite with several workers; run python -m src.archive"})
+    elif archiver is not None:
+        archiver.start()
 
 # Explicit health check endpoint — must be registered before the catch-all below
 @app.route('/health')
 def health():
     return jsonify({"status": "ok"}), 200
 
-# Serve static files (for potential basic frontend or testing)
+# Serve static files (for potential basic frontend or testing). The folder is
+# indexed and precompressed once at startup, so requests never hit the disk.
+from src.compression import AssetManifest
+static_assets = AssetManifest(app.static_folder)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if app.static_folder is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+    asset = static_assets.get(path) if path != "" else None
+    if asset is None:
+        asset = static_assets.get('index.html')
+    if asset is not None:
+        return static_assets.response(app, asset)
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            # If no index.html, maybe return API status or docs?
-            return jsonify({"message": "Backend API is running. No frontend index.html found."}), 200
-
-# Add a global error handler for debugging
+        # If no index.html, maybe return API status or docs?
+        return jsonify({"message": "Backend API is running. No frontend index.html found."}), 200
+
+# Unhandled errors are logged with their traceback and returned as JSON.
+# HTTP errors (404, 405, ...) keep their own status.
 @app.errorhandler(Exception)
 def handle_exception(e):
-    import traceback
-    print("Exception occurred:", e)
-    traceback.print_exc()
+    if isinstance(e, HTTPException):
+        return e
+    log.exception("unhandled_exception")
     return {"error": str(e)}, 500
 
 if __name__ == '__main__':
+    from src.migrate import run_migrations
+    with app.app_context():
+        run_migrations(db.engine)
     # Ensure the app runs on 0.0.0.0 to be accessible externally if needed
     app.run(host='0.0.0.0', port=5000, debug=True) # debug=False for production
 
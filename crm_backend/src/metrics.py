@@ -0,0 +1,159 @@
+"""Request and SQL instrumentation, exposed in Prometheus text format.
+
+``instrument(app)`` times every request and counts the SQL statements it
+runs (via the engine's before/after_cursor_execute events), then records
+latency, statement count, database time and response size per endpoint
+and status. ``GET /metrics`` renders everything collected by this process;
+with several gunicorn workers each scrape reflects the worker that served
+it, so aggregate with ``sum``/``rate`` across scrapes as usual.
+
+Statements slower than SLOW_QUERY_MS (unset to disable) are logged.
+"""
+import bisect
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                     for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint and status.", ["method", "endpoint", "status"])
+LATENCY = Histogram("http_request_duration_seconds", "Request latency.", ["method", "endpoint"])
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size (buffered responses only).",
+                          ["method", "endpoint"], SIZE_BUCKETS)
+STATEMENTS = Histogram("db_statements_per_request", "SQL statements executed per request.",
+                       ["method", "endpoint"], STATEMENT_BUCKETS)
+DB_TIME = Histogram("db_time_per_request_seconds", "Time spent in SQL per request.", ["method", "endpoint"])
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.")
+REJECTED = Counter("http_requests_rejected_total", "Requests refused by admission control (see src/ratelimit.py).",
+                   ["endpoint", "reason"])
+
+REGISTRY = [REQUESTS, LATENCY, RESPONSE_SIZE, STATEMENTS, DB_TIME, SLOW_QUERIES, REJECTED]
+
+def render():
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+SLOW_QUERY_SECONDS = float(os.environ["SLOW_QUERY_MS"]) / 1000 if os.environ.get("SLOW_QUERY_MS") else None
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("statement_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+    if SLOW_QUERY_SECONDS is not None and elapsed >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.inc()
+        log.warning("slow_query", extra={
+            "duration_ms": round(elapsed * 1000, 1),
+            "statement": " ".join(statement.split())[:500],
+            "endpoint": _endpoint() if has_request_context() else None,
+        })
+
+def _endpoint():
+    # The URL rule, not the path, so /deals/1 and /deals/2 share a series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+def _before_request():
+    g.request_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+
+def _after_request(response):
+    if "request_started" not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    endpoint, method = _endpoint(), request.method
+    REQUESTS.inc(method, endpoint, response.status_code)
+    LATENCY.observe(elapsed, method, endpoint)
+    STATEMENTS.observe(g.sql_count, method, endpoint)
+    DB_TIME.observe(g.sql_time, method, endpoint)
+    if not response.is_streamed and response.content_length is not None:
+        RESPONSE_SIZE.observe(response.content_length, method, endpoint)
+    log.info("request", extra={
+        "method": method, "endpoint": endpoint, "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 1), "sql_statements": g.sql_count,
+        "sql_ms": round(g.sql_time * 1000, 1), "bytes": response.content_length,
+    })
+    return response
+
+def instrument(app):
+    """Install the request hooks and the /metrics endpoint on ``app``.
+
+    Set METRICS_TOKEN to require ``Authorization: Bearer <token>`` on scrapes.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    token = os.environ.get("METRICS_TOKEN")
+
+    @app.route("/metrics")
+    def metrics():
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render(), mimetype="text/plain; version=0.0.4")
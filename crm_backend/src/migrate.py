@@ -0,0 +1,67 @@
+"""Apply pending schema migrations.
+
+Run once per deploy, before the web workers start:
+
+    python -m src.migrate
+
+Each module in src/migrations/ named ``NNNN_description.py`` defines
+``upgrade(connection)``. Applied versions are recorded in the
+``schema_migrations`` table, and every migration runs in its own transaction.
+"""
+import datetime
+import importlib
+import os
+import sys
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Postgres advisory lock key, so two containers deploying at once do not race
+MIGRATION_LOCK_ID = 72410
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", String(255), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def available_migrations():
+    names = sorted(f[:-3] for f in os.listdir(MIGRATIONS_DIR) if f[:4].isdigit() and f.endswith(".py"))
+    return [(name, importlib.import_module(f"src.migrations.{name}")) for name in names]
+
+def run_migrations(engine, log=print):
+    """Apply every migration not yet recorded; returns the versions applied."""
+    applied_now = []
+    with engine.connect() as lock_connection:
+        is_postgres = engine.dialect.name == "postgresql"
+        if is_postgres:
+            lock_connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            with engine.begin() as connection:
+                schema_migrations.create(connection, checkfirst=True)
+            with engine.connect() as connection:
+                applied = set(connection.scalars(select(schema_migrations.c.version)))
+            for version, module in available_migrations():
+                if version in applied:
+                    continue
+                log(f"Applying migration {version}")
+                with engine.begin() as connection:
+                    module.upgrade(connection)
+                    connection.execute(schema_migrations.insert().values(
+                        version=version, applied_at=datetime.datetime.utcnow()))
+                applied_now.append(version)
+        finally:
+            if is_postgres:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                lock_connection.commit()
+    return applied_now
+
+if __name__ == "__main__":
+    os.environ.setdefault("OUTBOX_DISPATCHER", "off")  # one-shot process; no webhook delivery
+    os.environ.setdefault("ARCHIVER", "off")  # nor archiving while the schema changes
+    from src.main import app
+    from src.models import db
+    with app.app_context():
+        versions = run_migrations(db.engine)
+    print(f"Applied {len(versions)} migration(s)" if versions else "Database schema is up to date")
+    sys.exit(0)
@@ -0,0 +1,81 @@
+"""Baseline schema: the six core tables."""
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Text, DateTime, Date, DECIMAL, Float,
+                        Enum, ForeignKey)
+from src.migrations import create_tables
+
+metadata = MetaData()
+
+clients = Table(
+    "clients", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("company", String(255), nullable=False),
+    Column("contact_name", String(255), nullable=False),
+    Column("email", String(255), unique=True, nullable=False),
+    Column("phone", String(50)),
+    Column("monday_board_id", String(255), nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("email", String(255), unique=True, nullable=False),
+    Column("role", Enum("Owner", "Admin", "SalesRep", name="user_roles"), nullable=False),
+    Column("password_hash", String(255), nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+deals = Table(
+    "deals", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("client_id", Integer, ForeignKey("clients.id"), nullable=False),
+    Column("sales_rep_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("estimated_value", DECIMAL(10, 2), nullable=False),
+    Column("probability", Float, nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("expected_close", Date),
+    Column("won_on", Date, nullable=True),
+    Column("lost_on", Date, nullable=True),
+)
+
+payment_schedules = Table(
+    "payment_schedules", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("milestone_name", String(255), nullable=False),
+    Column("amount_due", DECIMAL(10, 2), nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("status", Enum("pending", "paid", name="payment_status"), nullable=False),
+    Column("paid_on", Date, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+stage_histories = Table(
+    "stage_histories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("entered_at", DateTime),
+    Column("exited_at", DateTime, nullable=True),
+)
+
+action_items = Table(
+    "action_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("owner_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("completed_at", DateTime, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+def upgrade(connection):
+    create_tables(connection, clients, users, deals, payment_schedules, stage_histories, action_items)
@@ -0,0 +1,61 @@
+"""Index the foreign keys and hot-path filters.
+
+deals.client_id, deals.sales_rep_id and action_items.owner_id are covered by
+the leading column of a composite index rather than a separate one.
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Date, DateTime, Float, Index, text
+from src.migrations import create_indexes
+
+metadata = MetaData()
+
+deals = Table(
+    "deals", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("client_id", Integer),
+    Column("sales_rep_id", Integer),
+    Column("stage", String(100)),
+    Column("probability", Float),
+    Column("created_at", DateTime),
+    Column("expected_close", Date),
+)
+payment_schedules = Table(
+    "payment_schedules", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer),
+    Column("status", String(20)),
+    Column("due_date", Date),
+)
+stage_histories = Table(
+    "stage_histories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer),
+    Column("stage", String(100)),
+    Column("exited_at", DateTime),
+)
+action_items = Table(
+    "action_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer),
+    Column("owner_id", Integer),
+    Column("due_date", Date),
+    Column("completed_at", DateTime),
+)
+
+INDEXES = [
+    Index("ix_deals_created_at_id", deals.c.created_at, deals.c.id),
+    Index("ix_deals_stage_created_at_id", deals.c.stage, deals.c.created_at, deals.c.id),
+    Index("ix_deals_sales_rep_created_at_id", deals.c.sales_rep_id, deals.c.created_at, deals.c.id),
+    Index("ix_deals_client_created_at_id", deals.c.client_id, deals.c.created_at, deals.c.id),
+    Index("ix_deals_expected_close", deals.c.expected_close),
+    Index("ix_deals_probability", deals.c.probability),
+    Index("ix_payment_schedules_deal_id_due_date", payment_schedules.c.deal_id, payment_schedules.c.due_date),
+    Index("ix_payment_schedules_status_due_date", payment_schedules.c.status, payment_schedules.c.due_date),
+    Index("ix_stage_histories_deal_stage_exited", stage_histories.c.deal_id, stage_histories.c.stage, stage_histories.c.exited_at),
+    Index("ix_action_items_deal_id_due_date", action_items.c.deal_id, action_items.c.due_date),
+    Index("ix_action_items_owner_completed_due", action_items.c.owner_id, action_items.c.completed_at, action_items.c.due_date),
+    Index("ix_action_items_open_due_date", action_items.c.due_date, action_items.c.id,
+          postgresql_where=text("completed_at IS NULL"), sqlite_where=text("completed_at IS NULL")),
+]
+
+def upgrade(connection):
+    create_indexes(connection, *INDEXES)
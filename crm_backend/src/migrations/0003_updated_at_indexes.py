@@ -0,0 +1,16 @@
+"""Index updated_at so conditional GETs cost an index lookup, not a scan."""
+from sqlalchemy import MetaData, Table, Column, Integer, DateTime, Index
+from src.migrations import create_indexes
+
+metadata = MetaData()
+
+def _table(name):
+    return Table(name, metadata, Column("id", Integer, primary_key=True), Column("updated_at", DateTime))
+
+deals, clients, users = _table("deals"), _table("clients"), _table("users")
+
+def upgrade(connection):
+    create_indexes(connection,
+                   Index("ix_deals_updated_at", deals.c.updated_at),
+                   Index("ix_clients_updated_at", clients.c.updated_at),
+                   Index("ix_users_updated_at", users.c.updated_at))
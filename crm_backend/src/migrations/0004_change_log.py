@@ -0,0 +1,17 @@
+"""Append-only change log backing GET /api/changes."""
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime
+from src.migrations import create_tables
+
+metadata = MetaData()
+
+change_log = Table(
+    "change_log", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("entity", String(50), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("operation", String(10), nullable=False),
+    Column("changed_at", DateTime, nullable=False),
+)
+
+def upgrade(connection):
+    create_tables(connection, change_log)
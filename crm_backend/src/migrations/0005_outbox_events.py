@@ -0,0 +1,22 @@
+"""Durable outbox for outbound webhooks (Monday.com kickoff)."""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, Enum, Index
+from src.migrations import create_tables
+
+metadata = MetaData()
+
+outbox_events = Table(
+    "outbox_events", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("event_type", String(100), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("status", Enum("pending", "delivered", "failed", name="outbox_status"), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("last_error", Text, nullable=True),
+    Column("created_at", DateTime),
+    Column("delivered_at", DateTime, nullable=True),
+    Index("ix_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+)
+
+def upgrade(connection):
+    create_tables(connection, outbox_events)
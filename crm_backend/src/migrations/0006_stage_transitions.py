@@ -0,0 +1,54 @@
+"""Stage duration rollup for /api/analytics, backfilled from stage_histories."""
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, Float, ForeignKey, Index, func, insert, select
+from src.migrations import create_tables
+
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+deals = Table("deals", metadata, Column("id", Integer, primary_key=True), Column("sales_rep_id", Integer))
+stage_histories = Table(
+    "stage_histories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer),
+    Column("stage", String(100)),
+    Column("entered_at", DateTime),
+    Column("exited_at", DateTime),
+)
+
+stage_transitions = Table(
+    "stage_transitions", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("sales_rep_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("next_stage", String(100), nullable=True),
+    Column("entered_at", DateTime, nullable=False),
+    Column("exited_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=False),
+    Index("ix_stage_transitions_exited_at", "exited_at"),
+    Index("ix_stage_transitions_sales_rep_exited_at", "sales_rep_id", "exited_at"),
+)
+
+def backfill(connection, batch_size=1000):
+    history = stage_histories.c
+    # The stage a deal moved to is whichever history row follows in entry order
+    next_stage = func.lead(history.stage).over(partition_by=history.deal_id, order_by=(history.entered_at, history.id))
+    ordered = select(history.id, history.deal_id, history.stage, history.entered_at, history.exited_at,
+                     next_stage.label("next_stage")).subquery()
+    query = (select(ordered, deals.c.sales_rep_id)
+             .join(deals, deals.c.id == ordered.c.deal_id)
+             .where(ordered.c.exited_at.isnot(None)))
+    result = connection.execution_options(yield_per=batch_size).execute(query)
+    for partition in result.partitions():
+        rows = []
+        for row in partition:
+            entered_at = row.entered_at or row.exited_at
+            rows.append({"id": row.id, "deal_id": row.deal_id, "sales_rep_id": row.sales_rep_id,
+                         "stage": row.stage, "next_stage": row.next_stage,
+                         "entered_at": entered_at, "exited_at": row.exited_at,
+                         "duration_seconds": max((row.exited_at - entered_at).total_seconds(), 0.0)})
+        connection.execute(insert(stage_transitions), rows)
+
+def upgrade(connection):
+    create_tables(connection, stage_transitions)
+    backfill(connection)
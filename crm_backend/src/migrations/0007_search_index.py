@@ -0,0 +1,12 @@
+"""Full-text search indexes for GET /api/search (FTS5 on SQLite, GIN on Postgres)."""
+from src.search import install
+
+# Searched columns per table at this version
+SEARCHED = {
+    "clients": ["company", "contact_name", "email"],
+    "deals": ["stage"],
+    "action_items": ["description"],
+}
+
+def upgrade(connection):
+    install(connection, SEARCHED)
@@ -0,0 +1,78 @@
+"""Cold tables for closed deals moved out of the working set by src/archive.py.
+
+stage_transitions keeps its rows when a deal is archived (analytics still
+aggregate them), so its foreign key to deals is dropped.
+"""
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Text, DateTime, Date, DECIMAL, Float, Enum,
+                        Index, text)
+from src.migrations import create_tables, create_indexes
+
+metadata = MetaData()
+
+archived_deals = Table(
+    "archived_deals", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("client_id", Integer, nullable=False),
+    Column("sales_rep_id", Integer, nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("estimated_value", DECIMAL(10, 2), nullable=False),
+    Column("probability", Float, nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("expected_close", Date),
+    Column("won_on", Date),
+    Column("lost_on", Date),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_archived_deals_created_at_id", "created_at", "id"),
+    Index("ix_archived_deals_sales_rep_created_at_id", "sales_rep_id", "created_at", "id"),
+    Index("ix_archived_deals_won_on", "won_on"),
+)
+
+archived_payment_schedules = Table(
+    "archived_payment_schedules", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, nullable=False),
+    Column("milestone_name", String(255), nullable=False),
+    Column("amount_due", DECIMAL(10, 2), nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("status", Enum("pending", "paid", name="payment_status"), nullable=False),
+    Column("paid_on", Date),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_archived_payment_schedules_deal_id", "deal_id"),
+)
+
+archived_stage_histories = Table(
+    "archived_stage_histories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("entered_at", DateTime),
+    Column("exited_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_archived_stage_histories_deal_id", "deal_id"),
+)
+
+archived_action_items = Table(
+    "archived_action_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, nullable=False),
+    Column("description", Text, nullable=False),
+    Column("owner_id", Integer, nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("completed_at", DateTime),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_archived_action_items_deal_id", "deal_id"),
+)
+
+stage_transitions = Table("stage_transitions", metadata, Column("id", Integer, primary_key=True), Column("deal_id", Integer))
+
+def upgrade(connection):
+    create_tables(connection, archived_deals, archived_payment_schedules, archived_stage_histories, archived_action_items)
+    create_indexes(connection, Index("ix_stage_transitions_deal_id", stage_transitions.c.deal_id))
+    # SQLite does not enforce foreign keys here, so only Postgres has one to drop
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE stage_transitions DROP CONSTRAINT IF EXISTS stage_transitions_deal_id_fkey"))
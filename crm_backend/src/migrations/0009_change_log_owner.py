@@ -0,0 +1,6 @@
+"""Record the owning rep on change log rows, so /api/changes can scope tombstones."""
+from sqlalchemy import Column, Integer
+from src.migrations import add_columns
+
+def upgrade(connection):
+    add_columns(connection, "change_log", Column("sales_rep_id", Integer, nullable=True))
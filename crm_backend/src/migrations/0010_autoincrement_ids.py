@@ -0,0 +1,131 @@
+"""Never reuse ids in the tables src/archive.py moves rows out of (SQLite only).
+
+A plain SQLite INTEGER PRIMARY KEY hands out max(id) + 1, so archiving the
+newest row of a table gave its id to the next insert, which then collided
+with the archived copy (and, for stage_histories, with stage_transitions).
+AUTOINCREMENT ids are never reused. SQLite cannot add it to an existing
+table, so each table is rebuilt under a temporary name, swapped in, and has
+its indexes and search triggers recreated; its sequence then starts past
+every id already handed out, archived ones included. Postgres sequences never
+go backwards, so nothing changes there.
+"""
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Text, DateTime, Date, DECIMAL, Float, Enum,
+                        ForeignKey, Index, func, select, text)
+from sqlalchemy.schema import CreateTable
+from src import search
+from src.migrations import create_indexes
+
+metadata = MetaData()
+
+clients = Table("clients", metadata, Column("id", Integer, primary_key=True))
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+
+deals = Table(
+    "deals", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("client_id", Integer, ForeignKey("clients.id"), nullable=False),
+    Column("sales_rep_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("estimated_value", DECIMAL(10, 2), nullable=False),
+    Column("probability", Float, nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("expected_close", Date),
+    Column("won_on", Date),
+    Column("lost_on", Date),
+    Index("ix_deals_created_at_id", "created_at", "id"),
+    Index("ix_deals_stage_created_at_id", "stage", "created_at", "id"),
+    Index("ix_deals_sales_rep_created_at_id", "sales_rep_id", "created_at", "id"),
+    Index("ix_deals_client_created_at_id", "client_id", "created_at", "id"),
+    Index("ix_deals_expected_close", "expected_close"),
+    Index("ix_deals_probability", "probability"),
+    Index("ix_deals_updated_at", "updated_at"),
+    sqlite_autoincrement=True,
+)
+
+payment_schedules = Table(
+    "payment_schedules", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("milestone_name", String(255), nullable=False),
+    Column("amount_due", DECIMAL(10, 2), nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("status", Enum("pending", "paid", name="payment_status"), nullable=False),
+    Column("paid_on", Date),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_payment_schedules_deal_id_due_date", "deal_id", "due_date"),
+    Index("ix_payment_schedules_status_due_date", "status", "due_date"),
+    sqlite_autoincrement=True,
+)
+
+stage_histories = Table(
+    "stage_histories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("stage", String(100), nullable=False),
+    Column("entered_at", DateTime),
+    Column("exited_at", DateTime),
+    Index("ix_stage_histories_deal_stage_exited", "deal_id", "stage", "exited_at"),
+    sqlite_autoincrement=True,
+)
+
+action_items = Table(
+    "action_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("deal_id", Integer, ForeignKey("deals.id"), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("owner_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("due_date", Date, nullable=False),
+    Column("completed_at", DateTime),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_action_items_deal_id_due_date", "deal_id", "due_date"),
+    Index("ix_action_items_owner_completed_due", "owner_id", "completed_at", "due_date"),
+    Index("ix_action_items_open_due_date", "due_date", "id", sqlite_where=text("completed_at IS NULL")),
+    sqlite_autoincrement=True,
+)
+
+def _stub(name):
+    return Table(name, metadata, Column("id", Integer, primary_key=True))
+
+# Hot table -> the other tables whose ids it must stay clear of
+ISSUED = {
+    deals: [_stub("archived_deals")],
+    payment_schedules: [_stub("archived_payment_schedules")],
+    stage_histories: [_stub("archived_stage_histories"), _stub("stage_transitions")],
+    action_items: [_stub("archived_action_items")],
+}
+
+# The search triggers on the rebuilt tables, as of 0007_search_index
+SEARCHED = {
+    "deals": ["stage"],
+    "action_items": ["description"],
+}
+
+def rebuild(connection, table):
+    """Recreate ``table`` from its snapshot (with AUTOINCREMENT), keeping its rows and ids."""
+    temporary = f"{table.name}_rebuild"
+    ddl = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {temporary} ", 1))
+    columns = ", ".join(column.name for column in table.columns)
+    connection.exec_driver_sql(f"INSERT INTO {temporary} ({columns}) SELECT {columns} FROM {table.name}")
+    # Foreign keys are not enforced (no PRAGMA foreign_keys), so the children
+    # keep pointing at "deals" while it is swapped out
+    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+    connection.exec_driver_sql(f"ALTER TABLE {temporary} RENAME TO {table.name}")
+    create_indexes(connection, *table.indexes)
+
+def upgrade(connection):
+    if connection.dialect.name != "sqlite":
+        return
+    for table, others in ISSUED.items():
+        sql = connection.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                {"name": table.name})
+        if "AUTOINCREMENT" not in sql.upper():
+            rebuild(connection, table)
+        issued = max(connection.scalar(select(func.coalesce(func.max(t.c.id), 0))) for t in [table, *others])
+        connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+        connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                           {"name": table.name, "seq": issued})
+    search.install(connection, searched=SEARCHED)
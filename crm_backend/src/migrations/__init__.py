@@ -0,0 +1,32 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+# Helpers shared by migration modules. Each migration declares the tables and
+# indexes it creates as they were at that version, on its own MetaData, and
+# never imports src.models: the models describe the head schema, so building
+# from them would give fresh and upgraded databases different schemas as soon
+# as a model changes. Tables referenced only by foreign keys are declared as
+# stubs (just their primary key) so the DDL compiles; only the listed tables
+# are created. Everything is created with checkfirst, so a migration is a
+# no-op for databases bootstrapped with db.create_all() before migrations existed.
+
+def create_tables(connection, *tables):
+    for table in tables:
+        table.create(connection, checkfirst=True)
+
+def create_indexes(connection, *indexes):
+    existing = {}
+    for index in indexes:
+        name = index.table.name
+        if name not in existing:
+            existing[name] = {i["name"] for i in inspect(connection).get_indexes(name)}
+        if index.name not in existing[name]:
+            index.create(connection)
+
+def add_columns(connection, table, *columns):
+    """ALTER TABLE ... ADD COLUMN for each of ``columns`` the table lacks."""
+    existing = {column["name"] for column in inspect(connection).get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {ddl}")
@@ -10,3 +10,7 @@ from .deal import Deal
 from .payment_schedule import PaymentSchedule
 from .stage_history import StageHistory
 from .action_item import ActionItem
+from .change_log import ChangeLog
+from .outbox_event import OutboxEvent
+from .stage_transition import StageTransition
+from .archive import ArchivedDeal, ArchivedPaymentSchedule, ArchivedStageHistory, ArchivedActionItem, ARCHIVES
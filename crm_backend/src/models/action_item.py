@@ -1,10 +1,20 @@
 from .client import db # Assuming db is initialized in client.py or a central models file
-from sqlalchemy import Integer, Column, DateTime, Date, Text, ForeignKey
+from sqlalchemy import Integer, Column, DateTime, Date, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 import datetime
 
 class ActionItem(db.Model):
     __tablename__ = 'action_items'
+    __table_args__ = (
+        Index('ix_action_items_deal_id_due_date', 'deal_id', 'due_date'),
+        Index('ix_action_items_owner_completed_due', 'owner_id', 'completed_at', 'due_date'),
+        # Partial index over outstanding items only; the weekly report's
+        # ?completed=false query never has to skip completed rows
+        Index('ix_action_items_open_due_date', 'due_date', 'id',
+              postgresql_where=text('completed_at IS NULL'),
+              sqlite_where=text('completed_at IS NULL')),
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     deal_id = Column(Integer, ForeignKey('deals.id'), nullable=False)
@@ -0,0 +1,53 @@
+from . import db
+from .deal import Deal
+from .payment_schedule import PaymentSchedule
+from .stage_history import StageHistory
+from .action_item import ActionItem
+from sqlalchemy import Column, DateTime, Index, Table
+
+# Closed deals and their children are moved here by src/archive.py. Each
+# archive table has the columns of its hot table (built from it, so the two
+# cannot drift apart) plus archived_at. There are no defaults or foreign keys,
+# because rows only arrive by INSERT ... SELECT from the hot table.
+def _archive_table(table, *indexes):
+    columns = [Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+               for column in table.columns]
+    return Table(f"archived_{table.name}", db.metadata, *columns,
+                 Column("archived_at", DateTime, nullable=False), *indexes)
+
+class ArchivedDeal(db.Model):
+    __table__ = _archive_table(
+        Deal.__table__,
+        Index('ix_archived_deals_created_at_id', 'created_at', 'id'),
+        Index('ix_archived_deals_sales_rep_created_at_id', 'sales_rep_id', 'created_at', 'id'),
+        Index('ix_archived_deals_won_on', 'won_on'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedDeal {self.id} - Client {self.client_id}>'
+
+class ArchivedPaymentSchedule(db.Model):
+    __table__ = _archive_table(
+        PaymentSchedule.__table__,
+        Index('ix_archived_payment_schedules_deal_id', 'deal_id'),
+    )
+
+class ArchivedStageHistory(db.Model):
+    __table__ = _archive_table(
+        StageHistory.__table__,
+        Index('ix_archived_stage_histories_deal_id', 'deal_id'),
+    )
+
+class ArchivedActionItem(db.Model):
+    __table__ = _archive_table(
+        ActionItem.__table__,
+        Index('ix_archived_action_items_deal_id', 'deal_id'),
+    )
+
+# Hot model -> archive model, children before the deal (the order rows move in)
+ARCHIVES = {
+    PaymentSchedule: ArchivedPaymentSchedule,
+    StageHistory: ArchivedStageHistory,
+    ActionItem: ArchivedActionItem,
+    Deal: ArchivedDeal,
+}
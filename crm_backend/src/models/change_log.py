@@ -0,0 +1,19 @@
+from . import db
+from sqlalchemy import Integer, String, Column, DateTime
+import datetime
+
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+
+    # The autoincrement id is the sync cursor handed to /api/changes pollers
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(50), nullable=False) # deals, payment_schedules, action_items, stage_history
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False) # upsert, delete or archive
+    changed_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    # Rep owning the record's deal, kept for delete/archive rows so tombstones
+    # can be scoped to SalesReps after the deal itself is gone
+    sales_rep_id = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f'<ChangeLog {self.id} - {self.operation} {self.entity} {self.entity_id}>'
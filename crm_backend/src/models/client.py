@@ -1,10 +1,14 @@
 from . import db
-from sqlalchemy import Integer, String, Column, DateTime, Enum, ForeignKey, Text, Date, DECIMAL, Float
+from sqlalchemy import Integer, String, Column, DateTime, Enum, ForeignKey, Text, Date, DECIMAL, Float, Index
 from sqlalchemy.orm import relationship
 import datetime
 
 class Client(db.Model):
     __tablename__ = 'clients'
+    # max(updated_at) drives the ETag of the clients list (see src/conditional.py)
+    __table_args__ = (
+        Index('ix_clients_updated_at', 'updated_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     company = Column(String(255), nullable=False)
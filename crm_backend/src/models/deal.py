@@ -1,10 +1,24 @@
 from . import db
-from sqlalchemy import Integer, String, Column, DateTime, Date, DECIMAL, Float, ForeignKey
+from sqlalchemy import Integer, String, Column, DateTime, Date, DECIMAL, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import datetime
 
 class Deal(db.Model):
     __tablename__ = 'deals'
+    # Composite indexes end in (created_at, id) so every filtered listing
+    # can seek straight to its keyset cursor instead of sorting the table.
+    # AUTOINCREMENT keeps SQLite from reissuing the ids of archived deals
+    # (likewise on the child tables)
+    __table_args__ = (
+        Index('ix_deals_created_at_id', 'created_at', 'id'),
+        Index('ix_deals_stage_created_at_id', 'stage', 'created_at', 'id'),
+        Index('ix_deals_sales_rep_created_at_id', 'sales_rep_id', 'created_at', 'id'),
+        Index('ix_deals_client_created_at_id', 'client_id', 'created_at', 'id'),
+        Index('ix_deals_expected_close', 'expected_close'),
+        Index('ix_deals_probability', 'probability'),
+        Index('ix_deals_updated_at', 'updated_at'),
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
@@ -24,6 +38,8 @@ class Deal(db.Model):
     payment_schedules = relationship("PaymentSchedule", back_populates="deal", cascade="all, delete-orphan")
     stage_histories = relationship("StageHistory", back_populates="deal", cascade="all, delete-orphan")
     action_items = relationship("ActionItem", back_populates="deal", cascade="all, delete-orphan")
+    stage_transitions = relationship("StageTransition", back_populates="deal", cascade="all, delete-orphan",
+                                     primaryjoin="Deal.id == foreign(StageTransition.deal_id)")
 
     def __repr__(self):
         return f'<Deal {self.id} - Client {self.client_id}>'
@@ -0,0 +1,23 @@
+from . import db
+from sqlalchemy import Integer, String, Column, DateTime, Text, Enum, Index
+import datetime
+
+class OutboxEvent(db.Model):
+    __tablename__ = 'outbox_events'
+    # The dispatcher polls for due pending events in id order
+    __table_args__ = (
+        Index('ix_outbox_events_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(100), nullable=False) # e.g. deposit.paid
+    payload = Column(Text, nullable=False) # JSON body POSTed to the webhook
+    status = Column(Enum('pending', 'delivered', 'failed', name='outbox_status'), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.id} - {self.event_type} ({self.status})>'
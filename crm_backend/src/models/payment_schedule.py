@@ -1,10 +1,15 @@
 from .client import db # Assuming db is initialized in client.py or a central models file
-from sqlalchemy import Integer, String, Column, DateTime, Date, DECIMAL, Enum, ForeignKey
+from sqlalchemy import Integer, String, Column, DateTime, Date, DECIMAL, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import datetime
 
 class PaymentSchedule(db.Model):
     __tablename__ = 'payment_schedules'
+    __table_args__ = (
+        Index('ix_payment_schedules_deal_id_due_date', 'deal_id', 'due_date'),
+        Index('ix_payment_schedules_status_due_date', 'status', 'due_date'),
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     deal_id = Column(Integer, ForeignKey('deals.id'), nullable=False)
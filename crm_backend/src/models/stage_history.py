@@ -1,10 +1,16 @@
 from .client import db # Assuming db is initialized in client.py or a central models file
-from sqlalchemy import Integer, String, Column, DateTime, ForeignKey
+from sqlalchemy import Integer, String, Column, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import datetime
 
 class StageHistory(db.Model):
     __tablename__ = 'stage_histories'
+    # Serves both the per-deal history listing and update_deal's lookup of
+    # the open entry for the stage being left
+    __table_args__ = (
+        Index('ix_stage_histories_deal_stage_exited', 'deal_id', 'stage', 'exited_at'),
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     deal_id = Column(Integer, ForeignKey('deals.id'), nullable=False)
@@ -0,0 +1,33 @@
+from . import db
+from sqlalchemy import Integer, String, Column, DateTime, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+class StageTransition(db.Model):
+    """One completed stage interval, written when a deal leaves a stage.
+
+    A materialized rollup of StageHistory: each row carries the duration,
+    the stage the deal moved to and the rep who owned it at the time, so the
+    analytics endpoints aggregate this table instead of pairing up history
+    rows on every request.
+    """
+    __tablename__ = 'stage_transitions'
+    __table_args__ = (
+        Index('ix_stage_transitions_exited_at', 'exited_at'),
+        Index('ix_stage_transitions_sales_rep_exited_at', 'sales_rep_id', 'exited_at'),
+    )
+
+    # Same id as the StageHistory row that was closed. deal_id has no foreign
+    # key: rows stay here, for analytics, when src/archive.py moves the deal out
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    deal_id = Column(Integer, nullable=False, index=True)
+    sales_rep_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    stage = Column(String(100), nullable=False)
+    next_stage = Column(String(100), nullable=True)
+    entered_at = Column(DateTime, nullable=False)
+    exited_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+
+    deal = relationship("Deal", back_populates="stage_transitions", primaryjoin="foreign(StageTransition.deal_id) == Deal.id")
+
+    def __repr__(self):
+        return f'<StageTransition {self.id} - Deal {self.deal_id} - {self.stage} -> {self.next_stage}>'
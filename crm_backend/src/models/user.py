@@ -1,10 +1,14 @@
 from . import db
-from sqlalchemy import Integer, String, Column, Enum
+from sqlalchemy import Integer, String, Column, Enum, Index
 from sqlalchemy.orm import relationship
 import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
+    # max(updated_at) drives the ETag of the users list (see src/conditional.py)
+    __table_args__ = (
+        Index('ix_users_updated_at', 'updated_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
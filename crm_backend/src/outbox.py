@@ -0,0 +1,162 @@
+"""Transactional outbox for outbound webhooks.
+
+Routes call ``enqueue`` before committing, so the event row is written in the
+same transaction as the change that caused it: it exists if and only if the
+change does, and survives restarts. ``OutboxDispatcher`` delivers pending
+rows in the background with batching, bounded concurrency and exponential
+backoff. Delivery is at-least-once; receivers should tolerate duplicates.
+
+Run the dispatcher in-process (OUTBOX_DISPATCHER=thread, the default when
+MONDAY_KICKOFF_WEBHOOK_URL is set) or as its own process:
+
+    python -m src.outbox
+"""
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import os
+import random
+import threading
+import urllib.request
+from sqlalchemy import select, update
+
+from src.models import db, OutboxEvent
+from src.serializers import dumps, serialize_deal, serialize_client, serialize_payment_schedule
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+def enqueue(event_type, payload):
+    """Add an outbox row to the current session; the caller commits it."""
+    db.session.add(OutboxEvent(event_type=event_type, payload=dumps(payload)))
+
+def is_deposit(schedule):
+    return "deposit" in (schedule.milestone_name or "").lower()
+
+# Body expected by the n8n Monday.com kickoff workflow: { deal: {...}, client: {...} }
+def enqueue_deposit_paid(schedule):
+    deal = schedule.deal
+    enqueue("deposit.paid", {
+        "deal": serialize_deal(deal),
+        "client": serialize_client(deal.client) if deal.client else None,
+        "payment_schedule": serialize_payment_schedule(schedule),
+    })
+
+class OutboxDispatcher:
+    def __init__(self, app, url, batch_size=20, concurrency=4, max_attempts=8,
+                 base_delay=5, max_delay=3600, lease=60, timeout=10, poll_interval=2):
+        self.app = app
+        self.url = url
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="outbox")
+        self._stop = threading.Event()
+
+    def backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return datetime.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def claim(self):
+        """Lease a batch of due events so other dispatchers skip them.
+
+        The lease is taken by one conditional UPDATE that re-checks the event
+        is still pending and due, so of several dispatchers racing for an
+        event only one gets it back from RETURNING. That holds on SQLite,
+        where SKIP LOCKED is a no-op. On Postgres SKIP LOCKED also keeps them
+        from waiting on each other's rows. If this process dies mid-delivery
+        the lease simply expires and the events are picked up again.
+        """
+        now = datetime.datetime.utcnow()
+        due = (OutboxEvent.status == 'pending', OutboxEvent.next_attempt_at <= now)
+        batch = (select(OutboxEvent.id).where(*due)
+                 .order_by(OutboxEvent.id)
+                 .limit(self.batch_size)
+                 .with_for_update(skip_locked=True))
+        claimed = db.session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(batch.scalar_subquery()), *due)
+            .values(next_attempt_at=now + datetime.timedelta(seconds=self.lease))
+            .returning(OutboxEvent.id, OutboxEvent.payload),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.session.commit()
+        return sorted((event_id, payload) for event_id, payload in claimed)
+
+    def deliver(self, payload):
+        request = urllib.request.Request(self.url, data=payload.encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise RuntimeError(f"Webhook returned HTTP {response.status}")
+
+    def _attempt(self, claimed):
+        event_id, payload = claimed
+        try:
+            self.deliver(payload)
+            return event_id, None
+        except Exception as e:
+            return event_id, str(e) or type(e).__name__
+
+    def run_once(self):
+        """Deliver one batch; returns the number of events attempted."""
+        with self.app.app_context():
+            claimed = self.claim()
+            if not claimed:
+                return 0
+            outcomes = dict(self._pool.map(self._attempt, claimed))
+            now = datetime.datetime.utcnow()
+            for event in OutboxEvent.query.filter(OutboxEvent.id.in_(outcomes.keys())):
+                error = outcomes[event.id]
+                event.attempts += 1
+                if error is None:
+                    event.status = 'delivered'
+                    event.delivered_at = now
+                    event.last_error = None
+                else:
+                    event.last_error = error
+                    if event.attempts >= self.max_attempts:
+                        event.status = 'failed'
+                    else:
+                        event.next_attempt_at = now + self.backoff(event.attempts)
+            db.session.commit()
+            return len(claimed)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                attempted = self.run_once()
+            except Exception as e:
+                log.exception("outbox.cycle_failed")
+                attempted = 0
+            if attempted < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        threading.Thread(target=self.run_forever, name="outbox-dispatcher", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def dispatcher_from_env(app):
+    url = os.environ.get("MONDAY_KICKOFF_WEBHOOK_URL")
+    if not url:
+        return None
+    return OutboxDispatcher(
+        app, url,
+        batch_size=int(os.environ.get("OUTBOX_BATCH_SIZE", 20)),
+        concurrency=int(os.environ.get("OUTBOX_CONCURRENCY", 4)),
+        max_attempts=int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8)),
+    )
+
+if __name__ == "__main__":
+    os.environ["OUTBOX_DISPATCHER"] = "off"  # this process is the dispatcher
+    from src.main import app
+    dispatcher = dispatcher_from_env(app)
+    if dispatcher is None:
+        raise SystemExit("MONDAY_KICKOFF_WEBHOOK_URL is not set")
+    dispatcher.run_forever()
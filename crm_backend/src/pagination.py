@@ -0,0 +1,99 @@
+import base64
+import datetime
+import json
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+class PaginationError(ValueError):
+    """Raised when a limit or cursor query parameter cannot be parsed."""
+
+# Parse a single query-string filter, turning conversion errors into a client-facing message
+def parse_filter(args, name, convert, expected):
+    try:
+        return convert(args[name])
+    except ValueError:
+        raise ValueError(f"{name} must be {expected}")
+
+def parse_bool(value):
+    if value.lower() in ("true", "1", "yes"):
+        return True
+    if value.lower() in ("false", "0", "no"):
+        return False
+    raise ValueError
+
+def parse_limit(args, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    raw = args.get("limit")
+    if raw is None or raw == "":
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, maximum)
+
+# Cursors are opaque to clients: the sort key of the last row on a page,
+# JSON-encoded and base64'd so it survives being passed back in a query string
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, types):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(types):
+            raise ValueError
+        return [_coerce(value, kind) for value, kind in zip(values, types)]
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+def _coerce(value, kind):
+    if kind is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if kind is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return kind(value)
+
+def _seek(query, columns, types, cursor, descending, limit):
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, types))
+        query = query.filter(key < after if descending else key > after)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*order).limit(limit + 1).all()
+
+def _next_page(rows, columns, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+def keyset_page(query, columns, types, args, descending=True, default_limit=DEFAULT_LIMIT):
+    """Apply keyset (seek) pagination over ``columns`` to ``query``.
+
+    Returns ``(rows, next_cursor)``. One extra row is fetched to decide
+    whether another page exists, so no COUNT(*) is needed.
+    """
+    limit = parse_limit(args, default=default_limit)
+    rows = _seek(query, columns, types, args.get("cursor"), descending, limit)
+    return _next_page(rows, columns, limit)
+
+def keyset_merge(sources, types, args, descending=True, default_limit=DEFAULT_LIMIT):
+    """keyset_page over the union of several ``(query, columns)`` sources.
+
+    Each source is paged on its own index and the pages are merged in
+    Python, so sources must not share keys and their columns must have the
+    same keys (e.g. a hot table and its archive table).
+    """
+    limit = parse_limit(args, default=default_limit)
+    rows = []
+    for query, columns in sources:
+        rows.extend(_seek(query, columns, types, args.get("cursor"), descending, limit))
+    keys = [c.key for c in sources[0][1]]
+    rows.sort(key=lambda row: tuple(getattr(row, key) for key in keys), reverse=descending)
+    return _next_page(rows, sources[0][1], limit)
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+import functools
+import os
+import threading
+
+# Key derivation runs on a small dedicated pool. hashlib releases the GIL
+# while it works, so other request threads keep serving, and at most
+# PASSWORD_HASH_WORKERS derivations compete for CPU during a login burst.
+# The request thread still waits for its hash, so hashes in flight (running
+# or queued) are capped below the gunicorn thread count: a login burst can
+# never occupy every thread of a worker. A login past the cap is refused at
+# once with 503 instead of waiting for a slot.
+_threads = int(os.environ.get("GUNICORN_THREADS", 4))
+_in_flight = int(os.environ.get("PASSWORD_HASH_IN_FLIGHT", max(1, _threads - 1)))
+_workers = min(int(os.environ.get("PASSWORD_HASH_WORKERS", 2)), _in_flight)
+_executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(_in_flight)
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_IN_FLIGHT hashes are already running; callers answer 503."""
+
+def _run(fn, *args, **kwargs):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return _executor.submit(fn, *args, **kwargs).result()
+    finally:
+        _slots.release()
+
+@functools.lru_cache(maxsize=8)
+def _canonical_method(method):
+    # werkzeug expands shorthands such as "scrypt" to "scrypt:32768:8:1";
+    # derive the expanded form once so stored hashes can be compared to it
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+def hash_method():
+    return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+def hash_password(password):
+    return _run(generate_password_hash, password, method=hash_method())
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with different KDF parameters."""
+    return password_hash.split("$", 1)[0] != _canonical_method(hash_method())
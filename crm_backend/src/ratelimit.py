@@ -0,0 +1,225 @@
+"""Per-user rate limits and per-route concurrency caps for /api requests.
+
+Every authenticated request takes a token from a bucket keyed by the
+caller's JWT role and user_id. Expensive endpoints (collection lists,
+exports, stats, analytics, search) draw from a smaller bucket than
+everything else, so one script polling the deal list cannot use up the
+budget of other users. Later pages of a keyset-paginated list (requests
+with ?cursor=) cost one index seek each, so they draw from the cheap bucket
+and a client can page through the whole collection. A caller with an empty
+bucket gets 429 with Retry-After. Expensive endpoints also have a cap on
+requests in flight, sized to the request threads. Past the cap, requests get
+503 with Retry-After at once instead of queuing for a worker thread. The
+ASGI entry point turns the cap off by default, since its async reads are not
+bound to threads.
+
+``MemoryLimiter`` keeps state in the process, so each gunicorn worker
+enforces the limits separately. ``RedisLimiter`` keeps it in Redis (or a
+compatible store), so limits hold across workers and containers. Select one
+with RATE_LIMIT_BACKEND=memory|redis|off (and REDIS_URL).
+"""
+import math
+import os
+import threading
+import time
+import uuid
+from flask import g, jsonify, request
+
+from src.auth import get_jwt_identity
+from src.metrics import REJECTED
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+# Endpoints, or whole blueprints, whose cost grows with the data
+EXPENSIVE = {
+    "deal_bp.get_deals", "client_bp.get_clients", "user_bp.get_users", "action_item_bp.get_action_items",
+    "stats_bp.get_stats", "search_bp.search", "export_bp", "analytics_bp", "receivables_bp",
+}
+
+# Keyset-paginated lists whose continuation pages are billed as cheap
+PAGINATED = {"deal_bp.get_deals", "action_item_bp.get_action_items"}
+
+def route_class(endpoint):
+    blueprint = endpoint.rsplit(".", 1)[0] if "." in endpoint else None
+    return "expensive" if endpoint in EXPENSIVE or blueprint in EXPENSIVE else "cheap"
+
+def bucket_class(endpoint, args):
+    if endpoint in PAGINATED and args.get("cursor"):
+        return "cheap"
+    return route_class(endpoint)
+
+class Budget:
+    """A token bucket: ``burst`` requests at once, refilled at ``per_minute``."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.burst = burst
+
+class MemoryLimiter:
+    def __init__(self, budgets, concurrency):
+        self.budgets = budgets
+        self.concurrency = concurrency
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, budget):
+        """0 when a token was taken, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (budget.burst, now))
+            tokens = min(budget.burst, tokens + (now - updated_at) * budget.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / budget.rate
+
+    def acquire(self, route):
+        """A release token when ``route`` is under its cap, else None."""
+        with self._lock:
+            if self._in_flight.get(route, 0) >= self.concurrency:
+                return None
+            self._in_flight[route] = self._in_flight.get(route, 0) + 1
+        return route
+
+    def release(self, route, token):
+        with self._lock:
+            self._in_flight[route] -= 1
+
+# Token bucket in one round trip. Redis's clock is used so every worker
+# refills the same way; idle buckets expire once they would be full again.
+_TAKE = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+# In-flight requests are members of a sorted set scored by start time, so a
+# worker that dies mid-request only holds its slot until the lease runs out
+_ACQUIRE = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then return 0 end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+class RedisLimiter:
+    prefix = "crm:ratelimit"
+
+    def __init__(self, url, budgets, concurrency, lease=300):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.budgets = budgets
+        self.concurrency = concurrency
+        self.lease = lease
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE)
+        self._acquire = self._redis.register_script(_ACQUIRE)
+
+    def take(self, key, budget):
+        return float(self._take(keys=[f"{self.prefix}:bucket:{key}"], args=[budget.rate, budget.burst]))
+
+    def acquire(self, route):
+        token = uuid.uuid4().hex
+        if self._acquire(keys=[f"{self.prefix}:inflight:{route}"], args=[self.concurrency, self.lease, token]):
+            return token
+        return None
+
+    def release(self, route, token):
+        self._redis.zrem(f"{self.prefix}:inflight:{route}", token)
+
+def concurrency_from_env(backend):
+    """In-flight requests allowed per expensive endpoint; 0 disables the cap.
+
+    The default leaves one request thread per worker free for cheap requests.
+    The Redis cap counts across every worker in the cluster, so its default
+    is scaled by WEB_CONCURRENCY.
+    """
+    configured = os.environ.get("RATE_LIMIT_CONCURRENCY")
+    if configured:
+        return int(configured)
+    per_worker = max(1, int(os.environ.get("GUNICORN_THREADS", 4)) - 1)
+    if backend == "redis":
+        return per_worker * int(os.environ.get("WEB_CONCURRENCY", 1))
+    return per_worker
+
+def create_limiter():
+    backend = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    if backend == "off":
+        return None
+    budgets = {
+        "expensive": Budget(float(os.environ.get("RATE_LIMIT_EXPENSIVE_PER_MINUTE", 60)),
+                            int(os.environ.get("RATE_LIMIT_EXPENSIVE_BURST", 20))),
+        "cheap": Budget(float(os.environ.get("RATE_LIMIT_CHEAP_PER_MINUTE", 600)),
+                        int(os.environ.get("RATE_LIMIT_CHEAP_BURST", 100))),
+    }
+    concurrency = concurrency_from_env(backend)
+    if backend == "redis":
+        return RedisLimiter(os.environ.get("REDIS_URL", "redis://localhost:6379/0"), budgets, concurrency)
+    return MemoryLimiter(budgets, concurrency)
+
+def _admit(limiter):
+    if request.method == "OPTIONS" or request.endpoint is None or request.blueprint is None:
+        return None
+    # Unauthenticated requests are left to the auth check (and login to the
+    # password hasher's own queue), so only verified identities are keyed
+    user = get_jwt_identity()
+    if not user:
+        return None
+    endpoint, rule = request.endpoint, request.url_rule.rule
+    kind = route_class(endpoint)
+    bucket = bucket_class(endpoint, request.args)
+    try:
+        wait = limiter.take(f"{bucket}:{user['role']}:{user['user_id']}", limiter.budgets[bucket])
+        if wait > 0:
+            REJECTED.inc(rule, "rate_limited")
+            log.info("ratelimit.rejected", extra={"endpoint": rule, "user_id": user["user_id"], "class": bucket})
+            return jsonify({"message": "Rate limit exceeded, please retry later"}), 429, {"Retry-After": str(math.ceil(wait))}
+        if kind == "expensive" and limiter.concurrency:
+            token = limiter.acquire(endpoint)
+            if token is None:
+                REJECTED.inc(rule, "concurrency")
+                return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+            g.rate_limit_slot = (endpoint, token)
+    except Exception as e:
+        # Admission control fails open: an unreachable store must not take the API down
+        log.error("ratelimit.unavailable", extra={"error": str(e)})
+    return None
+
+def _release(limiter):
+    slot = g.pop("rate_limit_slot", None)
+    if slot is None:
+        return
+    try:
+        limiter.release(*slot)
+    except Exception as e:
+        log.error("ratelimit.release_failed", extra={"error": str(e)})
+
+def limit(app):
+    """Install admission control on ``app`` (a no-op with RATE_LIMIT_BACKEND=off).
+
+    Slots are released on teardown, which for streamed exports is when the
+    stream finishes.
+    """
+    limiter = create_limiter()
+    if limiter is None:
+        return None
+    app.before_request(lambda: _admit(limiter))
+    app.teardown_request(lambda exc: _release(limiter))
+    return limiter
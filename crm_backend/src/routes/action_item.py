@@ -1,30 +1,60 @@
 from flask import Blueprint, request, jsonify
 from src.models import db, ActionItem, Deal, User # Import necessary models
+from src.auth import jwt_required
+from src.pagination import keyset_page, parse_filter, parse_bool
+from src.bulk import read_bulk_rows, existing_ids, load_by_id, parse_fields, row_result, reject_duplicate_ids, bulk_response, to_int, to_date, to_datetime
+from src.serializers import serialize_action_item, action_item_rows, rows_to_dicts
+from src.change_tracking import record_changes
+from src.events import publish
+from sqlalchemy import insert
 import datetime
 
 action_item_bp = Blueprint("action_item_bp", __name__)
 
-# Helper function to serialize action item data
-def serialize_action_item(ai):
-    return {
-        "id": ai.id,
-        "deal_id": ai.deal_id,
-        "description": ai.description,
-        "owner_id": ai.owner_id,
-        "due_date": ai.due_date.isoformat() if ai.due_date else None,
-        "completed_at": ai.completed_at.isoformat() if ai.completed_at else None,
-        "created_at": ai.created_at.isoformat(),
-        "updated_at": ai.updated_at.isoformat(),
-        "owner_name": ai.owner.name if ai.owner else None # Optional: include owner name
-    }
+def publish_completion(item):
+    publish("action_item.completed", item.deal.sales_rep_id, deal_id=item.deal_id,
+            action_item_id=item.id, action_item=serialize_action_item(item))
+
+# List action items across all deals. Owner names are joined into the same
+# SELECT instead of being lazy-loaded one user per row. SalesReps only see
+# items on their own deals, whatever the filters ask for
+@action_item_bp.route("/action_items", methods=["GET"])
+@jwt_required
+def get_action_items(user):
+    args = request.args
+    query = action_item_rows(ActionItem.query)
+    scoped = user['role'] not in ['Admin', 'Owner']
+    if scoped or args.get("stage"):
+        query = query.join(ActionItem.deal)
+    if scoped:
+        query = query.filter(Deal.sales_rep_id == user['user_id'])
+    try:
+        if args.get("owner_id"):
+            query = query.filter(ActionItem.owner_id == parse_filter(args, "owner_id", int, "an integer"))
+        if args.get("deal_id"):
+            query = query.filter(ActionItem.deal_id == parse_filter(args, "deal_id", int, "an integer"))
+        if args.get("completed"):
+            if parse_filter(args, "completed", parse_bool, "true or false"):
+                query = query.filter(ActionItem.completed_at.isnot(None))
+            else:
+                query = query.filter(ActionItem.completed_at.is_(None))
+        if args.get("due_after"):
+            query = query.filter(ActionItem.due_date >= parse_filter(args, "due_after", datetime.date.fromisoformat, "an ISO date"))
+        if args.get("due_before"):
+            query = query.filter(ActionItem.due_date <= parse_filter(args, "due_before", datetime.date.fromisoformat, "an ISO date"))
+        if args.get("stage"):
+            query = query.filter(Deal.stage.in_(args["stage"].split(",")))
+        items, next_cursor = keyset_page(query, [ActionItem.due_date, ActionItem.id], [datetime.date, int], args, descending=False)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"action_items": rows_to_dicts(items), "next_cursor": next_cursor})
 
 # Get all action items for a specific deal
 @action_item_bp.route("/deals/<int:deal_id>/action_items", methods=["GET"])
 def get_action_items_for_deal(deal_id):
     deal = Deal.query.get_or_404(deal_id) # Ensure deal exists
-    # Optionally filter by completion status, owner, etc.
-    items = ActionItem.query.filter_by(deal_id=deal_id).order_by(ActionItem.due_date.asc()).all()
-    return jsonify({"action_items": [serialize_action_item(item) for item in items]})
+    items = action_item_rows(ActionItem.query).filter(ActionItem.deal_id == deal_id).order_by(ActionItem.due_date.asc()).all()
+    return jsonify({"action_items": rows_to_dicts(items)})
 
 # Create a new action item for a deal
 @action_item_bp.route("/deals/<int:deal_id>/action_items", methods=["POST"])
@@ -65,6 +95,7 @@ def get_action_item(item_id):
 def update_action_item(item_id):
     item = ActionItem.query.get_or_404(item_id)
     data = request.get_json()
+    was_completed = item.completed_at is not None
 
     try:
         item.description = data.get("description", item.description)
@@ -80,6 +111,8 @@ def update_action_item(item_id):
 
         item.updated_at = datetime.datetime.utcnow()
         db.session.commit()
+        if item.completed_at is not None and not was_completed:
+            publish_completion(item)
         return jsonify({"message": "Action item updated successfully", "action_item": serialize_action_item(item)})
     except Exception as e:
         db.session.rollback()
@@ -97,3 +130,72 @@ def delete_action_item(item_id):
         db.session.rollback()
         return jsonify({"message": "Failed to delete action item", "error": str(e)}), 500
 
+
+ACTION_ITEM_FIELDS = {
+    "deal_id": to_int,
+    "description": str,
+    "owner_id": to_int,
+    "due_date": to_date,
+    "completed_at": to_datetime,
+}
+
+# Create (rows without "id") and update (rows with "id") action items across
+# any number of deals in a single transaction
+@action_item_bp.route("/action_items/bulk", methods=["POST"])
+def bulk_upsert_action_items():
+    rows, error = read_bulk_rows("action_items")
+    if error:
+        return error
+
+    results = [None] * len(rows)
+    parsed = {}
+    for index, row in enumerate(rows):
+        try:
+            if "id" in row:
+                parsed[index] = parse_fields(row, dict(ACTION_ITEM_FIELDS, id=to_int), required=["id"])
+            else:
+                parsed[index] = parse_fields(row, ACTION_ITEM_FIELDS, required=["deal_id", "description", "owner_id", "due_date"])
+        except ValueError as e:
+            results[index] = row_result(index, "error", message=str(e))
+    reject_duplicate_ids(parsed, results)
+
+    values = parsed.values()
+    deals = existing_ids(Deal.id, [v["deal_id"] for v in values if "deal_id" in v])
+    owners = existing_ids(User.id, [v["owner_id"] for v in values if "owner_id" in v])
+    items = load_by_id(ActionItem, [v["id"] for v in values if "id" in v])
+
+    creates, completions = [], []
+    for index, v in parsed.items():
+        if "deal_id" in v and v["deal_id"] not in deals:
+            results[index] = row_result(index, "error", message="Deal not found")
+        elif "owner_id" in v and v["owner_id"] not in owners:
+            results[index] = row_result(index, "error", message="Owner (User) not found")
+        elif "id" in v and v["id"] not in items:
+            results[index] = row_result(index, "error", message="Action item not found")
+        elif "id" in v:
+            item = items[v.pop("id")]
+            if v.get("completed_at") and item.completed_at is None:
+                completions.append(item)
+            for field, value in v.items():
+                setattr(item, field, value)
+            item.updated_at = datetime.datetime.utcnow()
+            results[index] = row_result(index, "updated", id=item.id)
+        else:
+            creates.append((index, v))
+
+    try:
+        if creates:
+            new_ids = db.session.scalars(
+                insert(ActionItem).returning(ActionItem.id, sort_by_parameter_order=True),
+                [v for _, v in creates],
+            ).all()
+            record_changes(db.session, "action_items", new_ids)
+            for item_id, (index, _) in zip(new_ids, creates):
+                results[index] = row_result(index, "created", id=item_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to save action items", "error": str(e)}), 500
+    for item in completions:
+        publish_completion(item)
+    return bulk_response(results)
@@ -0,0 +1,138 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, func, case, union_all
+from src.models import db, Deal, ArchivedDeal, User, StageTransition
+from src.auth import jwt_required
+from src.pagination import parse_filter
+import datetime
+
+analytics_bp = Blueprint("analytics_bp", __name__)
+
+# Every report aggregates the stage_transitions rollup (one row per finished
+# stage interval, see src/analytics.py) inside the database. Durations are
+# in seconds; percentiles use the nearest-rank method.
+
+def _window(args, user):
+    """Filters shared by the reports: ?from= / ?to= (ISO dates, inclusive,
+    matched against when the deal left the stage) and ?sales_rep_id=."""
+    filters = []
+    if args.get("from"):
+        start = parse_filter(args, "from", datetime.date.fromisoformat, "an ISO date")
+        filters.append(StageTransition.exited_at >= start)
+    if args.get("to"):
+        end = parse_filter(args, "to", datetime.date.fromisoformat, "an ISO date")
+        filters.append(StageTransition.exited_at < end + datetime.timedelta(days=1))
+    # SalesReps only see their own figures
+    if user['role'] not in ['Admin', 'Owner']:
+        filters.append(StageTransition.sales_rep_id == user['user_id'])
+    elif args.get("sales_rep_id"):
+        filters.append(StageTransition.sales_rep_id == parse_filter(args, "sales_rep_id", int, "an integer"))
+    return filters
+
+def _duration_summary(group_column, filters):
+    """count, avg, median and p90 of duration_seconds per ``group_column``."""
+    ranked = select(
+        group_column.label("key"),
+        StageTransition.duration_seconds,
+        func.row_number().over(partition_by=group_column, order_by=StageTransition.duration_seconds).label("rank"),
+        func.count().over(partition_by=group_column).label("total"),
+    ).where(*filters).subquery()
+
+    def percentile(numerator, denominator):
+        # Row number ceil(total * p), in integer arithmetic so it runs unchanged on SQLite and Postgres
+        target = (ranked.c.total * numerator + denominator - 1) // denominator
+        return func.max(case((ranked.c.rank == target, ranked.c.duration_seconds)))
+
+    return db.session.execute(select(
+        ranked.c.key,
+        func.count(),
+        func.avg(ranked.c.duration_seconds),
+        percentile(1, 2),
+        percentile(9, 10),
+    ).group_by(ranked.c.key).order_by(ranked.c.key)).all()
+
+def _durations(count, average, median, p90):
+    return {"count": count, "averageSeconds": average, "medianSeconds": median, "p90Seconds": p90}
+
+# Time deals spend in each stage before moving on
+@analytics_bp.route("/analytics/stage_durations", methods=["GET"])
+@jwt_required
+def get_stage_durations(user):
+    try:
+        filters = _window(request.args, user)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    rows = _duration_summary(StageTransition.stage, filters)
+    return jsonify({"stages": [dict(stage=stage, **_durations(*figures)) for stage, *figures in rows]})
+
+# Where deals go when they leave each stage: for every stage, the number of
+# exits and the share of them that moved to each next stage
+@analytics_bp.route("/analytics/funnel", methods=["GET"])
+@jwt_required
+def get_funnel(user):
+    try:
+        filters = _window(request.args, user)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    exits = func.count()
+    rows = db.session.execute(
+        select(StageTransition.stage, StageTransition.next_stage, exits,
+               func.sum(exits).over(partition_by=StageTransition.stage))
+        .where(*filters)
+        .group_by(StageTransition.stage, StageTransition.next_stage)
+        .order_by(StageTransition.stage, exits.desc())
+    ).all()
+
+    stages = {}
+    for stage, next_stage, count, total in rows:
+        entry = stages.setdefault(stage, {"stage": stage, "exits": total, "conversions": []})
+        entry["conversions"].append({"toStage": next_stage, "count": count, "rate": round(count / total, 4)})
+    return jsonify({"stages": list(stages.values())})
+
+def _won_filters(model, args, user):
+    won = [model.won_on.isnot(None)]
+    if args.get("from"):
+        won.append(model.won_on >= parse_filter(args, "from", datetime.date.fromisoformat, "an ISO date"))
+    if args.get("to"):
+        won.append(model.won_on <= parse_filter(args, "to", datetime.date.fromisoformat, "an ISO date"))
+    if user['role'] not in ['Admin', 'Owner']:
+        won.append(model.sales_rep_id == user['user_id'])
+    elif args.get("sales_rep_id"):
+        won.append(model.sales_rep_id == parse_filter(args, "sales_rep_id", int, "an integer"))
+    return won
+
+# Per-rep velocity: how many stage moves they made in the window, how long
+# their deals sat in a stage, and what they closed
+@analytics_bp.route("/analytics/velocity", methods=["GET"])
+@jwt_required
+def get_velocity(user):
+    try:
+        filters = _window(request.args, user)
+        won = {model: _won_filters(model, request.args, user) for model in (Deal, ArchivedDeal)}
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    durations = {rep_id: figures for rep_id, *figures in _duration_summary(StageTransition.sales_rep_id, filters)}
+    # Won deals are counted whether or not src/archive.py has moved them out yet
+    won_deals = union_all(*[select(model.sales_rep_id, model.estimated_value).where(*conditions)
+                            for model, conditions in won.items()]).subquery()
+    closed = {rep_id: (count, value) for rep_id, count, value in db.session.execute(
+        select(won_deals.c.sales_rep_id, func.count(), func.sum(won_deals.c.estimated_value)).group_by(won_deals.c.sales_rep_id)
+    )}
+    rep_ids = sorted(set(durations) | set(closed))
+    names = dict(db.session.execute(select(User.id, User.name).where(User.id.in_(rep_ids))).all()) if rep_ids else {}
+
+    reps = []
+    for rep_id in rep_ids:
+        count, average, median, p90 = durations.get(rep_id, (0, None, None, None))
+        won_count, won_value = closed.get(rep_id, (0, None))
+        reps.append({
+            "salesRepId": rep_id,
+            "salesRepName": names.get(rep_id),
+            "stageMoves": count,
+            "averageSecondsInStage": average,
+            "medianSecondsInStage": median,
+            "p90SecondsInStage": p90,
+            "wonCount": won_count,
+            "wonValue": str(won_value if won_value is not None else 0),
+        })
+    return jsonify({"reps": reps})
@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify
+from src.models import ChangeLog, Deal, PaymentSchedule, ActionItem, StageHistory
+from src.auth import jwt_required
+from src.pagination import parse_limit, parse_filter
+from src.serializers import deal_rows, action_item_rows, rows_to_dicts, PAYMENT_SCHEDULE_COLUMNS, STAGE_HISTORY_COLUMNS
+
+changes_bp = Blueprint("changes_bp", __name__)
+
+# Load the current state of changed records. Every query joins the owning
+# deal so SalesReps only receive records from their own deals.
+def _current_rows(entity, ids, user):
+    if entity == "deals":
+        query = deal_rows(Deal.query).filter(Deal.id.in_(ids))
+    elif entity == "payment_schedules":
+        query = PaymentSchedule.query.join(Deal).filter(PaymentSchedule.id.in_(ids)).with_entities(*PAYMENT_SCHEDULE_COLUMNS)
+    elif entity == "action_items":
+        query = action_item_rows(ActionItem.query).join(Deal, ActionItem.deal_id == Deal.id).filter(ActionItem.id.in_(ids))
+    else:
+        query = StageHistory.query.join(Deal).filter(StageHistory.id.in_(ids)).with_entities(*STAGE_HISTORY_COLUMNS)
+    if user['role'] not in ['Admin', 'Owner']:
+        query = query.filter(Deal.sales_rep_id == user['user_id'])
+    return rows_to_dicts(query.all())
+
+# Incremental sync: everything that changed after the ``since`` cursor.
+# Several changes to one record collapse into its latest state, and deletes
+# are returned as tombstone ids. Poll again with the returned cursor until
+# has_more is false.
+@changes_bp.route("/changes", methods=["GET"])
+@jwt_required
+def get_changes(user):
+    try:
+        since = parse_filter(request.args, "since", int, "an integer") if request.args.get("since") else 0
+        limit = parse_limit(request.args, default=500, maximum=5000)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    entries = ChangeLog.query.filter(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity, entry.entity_id)] = (entry.operation, entry.sales_rep_id)
+
+    changed = {entity: [] for entity in ("deals", "payment_schedules", "action_items", "stage_history")}
+    deleted = {entity: [] for entity in changed}
+    scoped = user['role'] not in ['Admin', 'Owner']
+    for (entity, entity_id), (operation, sales_rep_id) in latest.items():
+        if operation == "upsert":
+            changed[entity].append(entity_id)
+        # The record is gone, so its tombstone is scoped by the rep recorded with it
+        elif not scoped or sales_rep_id == user['user_id']:
+            deleted[entity].append(entity_id)
+
+    return jsonify({
+        "changes": {entity: _current_rows(entity, ids, user) if ids else [] for entity, ids in changed.items()},
+        "deleted": deleted,
+        "cursor": entries[-1].id if entries else since,
+        "has_more": has_more,
+    })
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.models import db, Client
+from src.serializers import serialize_client, rows_to_dicts, CLIENT_COLUMNS
+from src.conditional import conditional_get
 
 client_bp = Blueprint('client_bp', __name__)
 
@@ -25,36 +27,15 @@ def create_client():
 
 @client_bp.route('/clients', methods=['GET'])
 def get_clients():
-    clients = Client.query.all()
-    output = []
-    for client in clients:
-        client_data = {
-            'id': client.id,
-            'company': client.company,
-            'contact_name': client.contact_name,
-            'email': client.email,
-            'phone': client.phone,
-            'monday_board_id': client.monday_board_id,
-            'created_at': client.created_at,
-            'updated_at': client.updated_at
-        }
-        output.append(client_data)
-    return jsonify({'clients': output})
+    def render():
+        clients = Client.query.with_entities(*CLIENT_COLUMNS).all()
+        return jsonify({'clients': rows_to_dicts(clients)})
+    return conditional_get([(Client.query, Client.updated_at, Client.id)], render)
 
 @client_bp.route('/clients/<int:client_id>', methods=['GET'])
 def get_client(client_id):
     client = Client.query.get_or_404(client_id)
-    client_data = {
-        'id': client.id,
-        'company': client.company,
-        'contact_name': client.contact_name,
-        'email': client.email,
-        'phone': client.phone,
-        'monday_board_id': client.monday_board_id,
-        'created_at': client.created_at,
-        'updated_at': client.updated_at
-    }
-    return jsonify({'client': client_data})
+    return jsonify({'client': serialize_client(client)})
 
 @client_bp.route('/clients/<int:client_id>', methods=['PUT'])
 def update_client(client_id):
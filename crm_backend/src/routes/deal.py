@@ -1,51 +1,25 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, abort
 from src.models import db, Deal
-from src.models import Client, User, StageHistory
+from src.models import Client, User, StageHistory, PaymentSchedule, ActionItem
+from src.models import ArchivedDeal, ArchivedPaymentSchedule, ArchivedStageHistory, ArchivedActionItem
+from src.pagination import keyset_page, keyset_merge, parse_filter, parse_bool
+from src.bulk import read_bulk_rows, existing_ids, parse_fields, row_result, reject_duplicate_ids, bulk_response, to_int, to_decimal, to_date
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from src.auth import jwt_required
+from src.serializers import serialize_deal, deal_rows, rows_to_dicts, action_item_rows, payment_schedule_columns, stage_history_columns
+from src.conditional import conditional_get
+from src.change_tracking import record_changes
+from src.events import publish
+from src.analytics import record_stage_exits
 import datetime
-import jwt
-from functools import wraps
 
 deal_bp = Blueprint("deal_bp", __name__)
 
-# Helper to decode JWT and get user info
-def get_jwt_identity():
-    auth_header = request.headers.get('Authorization', None)
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ')[1]
-    try:
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return payload
-    except Exception:
-        return None
-
-def jwt_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        user = get_jwt_identity()
-        if not user:
-            return jsonify({'message': 'Missing or invalid token'}), 401
-        return f(user, *args, **kwargs)
-    return decorated
-
-# Helper function to serialize deal data
-def serialize_deal(deal):
-    return {
-        "id": deal.id,
-        "client_id": deal.client_id,
-        "sales_rep_id": deal.sales_rep_id,
-        "stage": deal.stage,
-        "estimated_value": str(deal.estimated_value), # Convert Decimal to string
-        "probability": deal.probability,
-        "created_at": deal.created_at.isoformat(),
-        "updated_at": deal.updated_at.isoformat(),
-        "expected_close": deal.expected_close.isoformat() if deal.expected_close else None,
-        "won_on": deal.won_on.isoformat() if deal.won_on else None,
-        "lost_on": deal.lost_on.isoformat() if deal.lost_on else None,
-        # Optionally include related data previews
-        "client_company": deal.client.company if deal.client else None,
-        "sales_rep_name": deal.sales_rep.name if deal.sales_rep else None
-    }
+# Eager-load the relations serialize_deal reads so loading a deal does not
+# issue extra SELECTs for the client and the rep
+def deal_query():
+    return Deal.query.options(joinedload(Deal.client), joinedload(Deal.sales_rep))
 
 @deal_bp.route("/deals", methods=["POST"])
 def create_deal():
@@ -87,20 +61,163 @@ def create_deal():
         db.session.rollback()
         return jsonify({"message": "Failed to create deal", "error": str(e)}), 500
 
+# Child collections ?include= can attach to each deal, each loaded for a
+# whole page of deals with one IN query (same ordering as the per-deal
+# listings). Each builder takes the hot or the archive model.
+DEAL_INCLUDES = {
+    "payment_schedules": ((lambda model, ids: model.query.filter(model.deal_id.in_(ids))
+        .order_by(model.deal_id, model.due_date).with_entities(*payment_schedule_columns(model))),
+        PaymentSchedule, ArchivedPaymentSchedule),
+    "stage_history": ((lambda model, ids: model.query.filter(model.deal_id.in_(ids))
+        .order_by(model.deal_id, model.entered_at).with_entities(*stage_history_columns(model))),
+        StageHistory, ArchivedStageHistory),
+    "action_items": ((lambda model, ids: action_item_rows(model.query, model).filter(model.deal_id.in_(ids))
+        .order_by(model.deal_id, model.due_date)),
+        ActionItem, ArchivedActionItem),
+}
+
+MAX_DEAL_IDS = 500
+
+def parse_includes(args):
+    includes = args["include"].split(",") if args.get("include") else []
+    unknown = [name for name in includes if name not in DEAL_INCLUDES]
+    if unknown:
+        raise ValueError(f"include must be one or more of {', '.join(DEAL_INCLUDES)}")
+    return includes
+
+def with_children(deals, includes, hot=True, archived=False):
+    """Deal rows as dicts, each carrying the requested child lists.
+
+    Costs one query per include and table read (``hot`` and/or
+    ``archived``), however many deals there are.
+    """
+    deals = rows_to_dicts(deals)
+    if not deals:
+        return deals
+    by_id = {deal["id"]: deal for deal in deals}
+    for name in includes:
+        for deal in deals:
+            deal[name] = []
+        build, hot_model, archived_model = DEAL_INCLUDES[name]
+        models = ([hot_model] if hot else []) + ([archived_model] if archived else [])
+        for model in models:
+            for row in build(model, list(by_id)):
+                by_id[row.deal_id][name].append(row._asdict())
+    return deals
+
+def parse_ids(value):
+    ids = [int(part) for part in value.split(",")]
+    if len(ids) > MAX_DEAL_IDS:
+        raise ValueError
+    return ids
+
+def include_archived(args):
+    if not args.get("include_archived"):
+        return False
+    return parse_filter(args, "include_archived", parse_bool, "true or false")
+
+# Apply the optional server-side filters accepted by the deal list (to
+# Deal, or to ArchivedDeal for ?include_archived=true)
+def apply_deal_filters(query, args, model=Deal):
+    if args.get("ids"):
+        query = query.filter(model.id.in_(parse_filter(args, "ids", parse_ids, f"a comma-separated list of up to {MAX_DEAL_IDS} integers")))
+    if args.get("stage"):
+        query = query.filter(model.stage.in_(args["stage"].split(",")))
+    if args.get("sales_rep_id"):
+        query = query.filter(model.sales_rep_id == parse_filter(args, "sales_rep_id", int, "an integer"))
+    if args.get("client_id"):
+        query = query.filter(model.client_id == parse_filter(args, "client_id", int, "an integer"))
+    if args.get("expected_close_from"):
+        query = query.filter(model.expected_close >= parse_filter(args, "expected_close_from", datetime.date.fromisoformat, "an ISO date"))
+    if args.get("expected_close_to"):
+        query = query.filter(model.expected_close <= parse_filter(args, "expected_close_to", datetime.date.fromisoformat, "an ISO date"))
+    if args.get("probability_min"):
+        query = query.filter(model.probability >= parse_filter(args, "probability_min", float, "a number"))
+    if args.get("probability_max"):
+        query = query.filter(model.probability <= parse_filter(args, "probability_max", float, "a number"))
+    return query
+
+# Only Admins and Owners see all deals; SalesReps see only their own
+def visible_deals(user, model=Deal):
+    query = model.query
+    if user['role'] not in ['Admin', 'Owner']:
+        query = query.filter(model.sales_rep_id == user['user_id'])
+    return query
+
 @deal_bp.route("/deals", methods=["GET"])
 @jwt_required
 def get_deals(user):
-    # Only Admins and Owners see all deals; SalesReps see only their own
-    if user['role'] in ['Admin', 'Owner']:
-        deals = Deal.query.order_by(Deal.created_at.desc()).all()
-    else:
-        deals = Deal.query.filter_by(sales_rep_id=user['user_id']).order_by(Deal.created_at.desc()).all()
-    return jsonify({"deals": [serialize_deal(deal) for deal in deals]})
+    try:
+        query = apply_deal_filters(visible_deals(user), request.args)
+        includes = parse_includes(request.args)
+        archived = include_archived(request.args)
+        if archived:
+            archived_query = apply_deal_filters(visible_deals(user, ArchivedDeal), request.args, ArchivedDeal)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    def render():
+        # Select plain column tuples (client and rep names joined in) rather than ORM objects
+        if archived:
+            # Closed deals moved out by src/archive.py; each table is paged on
+            # its own (created_at, id) index and the two pages are merged
+            deals, next_cursor = keyset_merge([
+                (deal_rows(query), [Deal.created_at, Deal.id]),
+                (deal_rows(archived_query, ArchivedDeal), [ArchivedDeal.created_at, ArchivedDeal.id]),
+            ], [datetime.datetime, int], request.args)
+        else:
+            deals, next_cursor = keyset_page(deal_rows(query), [Deal.created_at, Deal.id], [datetime.datetime, int], request.args)
+        return jsonify({"deals": with_children(deals, includes, archived=archived), "next_cursor": next_cursor})
+
+    if includes:
+        # Child rows are not covered by the validators below, so expanded pages are always rendered
+        try:
+            return render()
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+    # Client and rep names are part of each row, so their changes count too
+    sources = [(query, Deal.updated_at, Deal.id), (Client.query, Client.updated_at, Client.id), (User.query, User.updated_at, User.id)]
+    if archived:
+        # Archived rows never change, but each archiving run adds some
+        sources.append((archived_query, ArchivedDeal.archived_at, ArchivedDeal.id))
+    try:
+        return conditional_get(sources, render, scope=(user['role'], user['user_id'], archived))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+# Single-deal reads look in the archive too when asked, so a deal that was
+# archived between listing it and opening it can still be shown
+def find_deal(deal_id, query, archived_query, archived):
+    row = query.filter(Deal.id == deal_id).first()
+    if row is not None:
+        return row, False
+    if archived:
+        return archived_query.filter(ArchivedDeal.id == deal_id).first_or_404(), True
+    abort(404)
 
 @deal_bp.route("/deals/<int:deal_id>", methods=["GET"])
 def get_deal(deal_id):
-    deal = Deal.query.get_or_404(deal_id)
-    return jsonify({"deal": serialize_deal(deal)})
+    try:
+        archived = include_archived(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    deal, from_archive = find_deal(deal_id, deal_query(), deal_rows(ArchivedDeal.query, ArchivedDeal), archived)
+    return jsonify({"deal": deal._asdict() if from_archive else serialize_deal(deal)})
+
+# A deal with its client and rep names and all its child collections, for
+# the deal card: four queries in total instead of four requests. Scoped like
+# GET /deals, so a SalesRep gets 404 for another rep's deal
+@deal_bp.route("/deals/<int:deal_id>/full", methods=["GET"])
+@jwt_required
+def get_deal_full(user, deal_id):
+    try:
+        archived = include_archived(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    deal, from_archive = find_deal(deal_id, deal_rows(visible_deals(user)),
+                                   deal_rows(visible_deals(user, ArchivedDeal), ArchivedDeal), archived)
+    return jsonify({"deal": with_children([deal], list(DEAL_INCLUDES), hot=not from_archive, archived=from_archive)[0]})
 
 @deal_bp.route("/deals/<int:deal_id>", methods=["PUT"])
 def update_deal(deal_id):
@@ -135,6 +252,7 @@ def update_deal(deal_id):
             last_history = StageHistory.query.filter_by(deal_id=deal.id, stage=original_stage, exited_at=None).order_by(StageHistory.entered_at.desc()).first()
             if last_history:
                 last_history.exited_at = now
+                record_stage_exits(db.session, [(last_history, deal.stage, deal.sales_rep_id)])
 
             # Create new history entry for the new stage
             new_history = StageHistory(
@@ -146,6 +264,9 @@ def update_deal(deal_id):
 
         deal.updated_at = datetime.datetime.utcnow()
         db.session.commit()
+        if deal.stage != original_stage:
+            publish("deal.stage_changed", deal.sales_rep_id, deal_id=deal.id,
+                    from_stage=original_stage, to_stage=deal.stage, deal=serialize_deal(deal))
         return jsonify({"message": "Deal updated successfully", "deal": serialize_deal(deal)})
     except Exception as e:
         db.session.rollback()
@@ -163,3 +284,108 @@ def delete_deal(deal_id):
         db.session.rollback()
         return jsonify({"message": "Failed to delete deal", "error": str(e)}), 500
 
+DEAL_FIELDS = {
+    "client_id": to_int,
+    "sales_rep_id": to_int,
+    "stage": str,
+    "estimated_value": to_decimal,
+    "probability": float,
+    "expected_close": to_date,
+    "won_on": to_date,
+    "lost_on": to_date,
+}
+
+# Create deals (rows without "id") and update deals (rows with "id") in one
+# transaction. Foreign keys are checked with one IN query per table and new
+# deals plus their initial StageHistory rows are inserted with executemany.
+# SalesReps can only update their own deals and every row is assigned to them.
+@deal_bp.route("/deals/bulk", methods=["POST"])
+@jwt_required
+def bulk_upsert_deals(user):
+    rows, error = read_bulk_rows("deals")
+    if error:
+        return error
+    scoped = user['role'] not in ['Admin', 'Owner']
+
+    results = [None] * len(rows)
+    parsed = {}
+    for index, row in enumerate(rows):
+        try:
+            if "id" in row:
+                parsed[index] = parse_fields(row, dict(DEAL_FIELDS, id=to_int), required=["id"])
+            else:
+                required = ["client_id", "sales_rep_id", "stage", "estimated_value", "probability", "expected_close"]
+                if scoped:
+                    required.remove("sales_rep_id")
+                parsed[index] = parse_fields(row, DEAL_FIELDS, required=required)
+        except ValueError as e:
+            results[index] = row_result(index, "error", message=str(e))
+            continue
+        if scoped:
+            parsed[index]["sales_rep_id"] = user['user_id']
+    reject_duplicate_ids(parsed, results)
+
+    values = parsed.values()
+    clients = existing_ids(Client.id, [v["client_id"] for v in values if "client_id" in v])
+    reps = existing_ids(User.id, [v["sales_rep_id"] for v in values if "sales_rep_id" in v])
+    deal_ids = {v["id"] for v in values if "id" in v}
+    deals = {deal.id: deal for deal in visible_deals(user).filter(Deal.id.in_(deal_ids))} if deal_ids else {}
+
+    creates, stage_changes = [], {}
+    for index, v in list(parsed.items()):
+        if "client_id" in v and v["client_id"] not in clients:
+            results[index] = row_result(index, "error", message="Client not found")
+        elif "sales_rep_id" in v and v["sales_rep_id"] not in reps:
+            results[index] = row_result(index, "error", message="Sales Rep (User) not found")
+        elif "id" in v and v["id"] not in deals:
+            results[index] = row_result(index, "error", message="Deal not found")
+        elif "id" in v:
+            deal = deals[v.pop("id")]
+            if "stage" in v and v["stage"] != deal.stage:
+                stage_changes[deal.id] = (deal.stage, v["stage"])
+            for field, value in v.items():
+                setattr(deal, field, value)
+            deal.updated_at = datetime.datetime.utcnow()
+            results[index] = row_result(index, "updated", id=deal.id)
+        else:
+            creates.append((index, v))
+
+    try:
+        now = datetime.datetime.utcnow()
+        if creates:
+            new_ids = db.session.scalars(
+                insert(Deal).returning(Deal.id, sort_by_parameter_order=True),
+                [v for _, v in creates],
+            ).all()
+            history_ids = db.session.scalars(insert(StageHistory).returning(StageHistory.id), [
+                {"deal_id": deal_id, "stage": v["stage"], "entered_at": now}
+                for deal_id, (_, v) in zip(new_ids, creates)
+            ]).all()
+            record_changes(db.session, "deals", new_ids)
+            record_changes(db.session, "stage_history", history_ids)
+            for deal_id, (index, _) in zip(new_ids, creates):
+                results[index] = row_result(index, "created", id=deal_id)
+        if stage_changes:
+            open_histories = StageHistory.query.filter(
+                StageHistory.deal_id.in_(stage_changes.keys()),
+                StageHistory.exited_at.is_(None),
+            ).all()
+            exits = []
+            for history in open_histories:
+                if history.stage == stage_changes[history.deal_id][0]:
+                    history.exited_at = now
+                    exits.append((history, stage_changes[history.deal_id][1], deals[history.deal_id].sales_rep_id))
+            record_stage_exits(db.session, exits)
+            history_ids = db.session.scalars(insert(StageHistory).returning(StageHistory.id), [
+                {"deal_id": deal_id, "stage": new_stage, "entered_at": now}
+                for deal_id, (_, new_stage) in stage_changes.items()
+            ]).all()
+            record_changes(db.session, "stage_history", history_ids)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to save deals", "error": str(e)}), 500
+    for deal_id, (from_stage, to_stage) in stage_changes.items():
+        publish("deal.stage_changed", deals[deal_id].sales_rep_id, deal_id=deal_id,
+                from_stage=from_stage, to_stage=to_stage, deal=serialize_deal(deals[deal_id]))
+    return bulk_response(results)
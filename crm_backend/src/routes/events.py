@@ -0,0 +1,55 @@
+from flask import Blueprint, request, jsonify, Response, current_app
+from src.auth import public, get_jwt_identity, decode_token
+from src.events import broadcaster, visible_to, SubscriberLimitReached, StreamsDisabled
+from src.serializers import dumps
+import time
+
+events_bp = Blueprint("events_bp", __name__)
+
+KEEPALIVE_SECONDS = 15
+
+# Server-Sent Events stream of live pipeline changes (deal stage moves,
+# payment status flips, action item completions), scoped like GET /deals.
+# EventSource cannot send headers, so the token may also be passed as
+# ?token=. Each stream holds one of the worker's SSE_THREADS, so streams are
+# capped at that count and closed after SSE_MAX_DURATION seconds; browsers reconnect
+# automatically and can catch up through /api/changes.
+@events_bp.route("/events", methods=["GET"])
+@public
+def stream_events():
+    user = None
+    if request.args.get("token"):
+        try:
+            user = decode_token(request.args["token"])
+        except Exception:
+            user = None
+    else:
+        user = get_jwt_identity()
+    if not user:
+        return jsonify({'message': 'Missing or invalid token'}), 401
+
+    try:
+        subscription = broadcaster.subscribe()
+    except SubscriberLimitReached:
+        return jsonify({"message": "Too many open event streams"}), 503, {"Retry-After": "5"}
+    except StreamsDisabled:
+        return jsonify({"message": "Live events are disabled on this server"}), 503
+    max_duration = current_app.config.get("SSE_MAX_DURATION", 300)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            deadline = time.monotonic() + max_duration
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif visible_to(event, user):
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # keep reverse proxies from buffering the stream
+    })
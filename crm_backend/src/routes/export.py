@@ -0,0 +1,99 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from sqlalchemy import select
+from src.models import db, Deal, Client, User, PaymentSchedule, StageHistory
+from src.serializers import dumps
+from src.auth import jwt_required
+from decimal import Decimal
+import csv
+import datetime
+import io
+
+export_bp = Blueprint("export_bp", __name__)
+
+# Rows are pulled from a server-side cursor this many at a time, so memory
+# use is bounded by one batch regardless of table size
+EXPORT_BATCH_SIZE = 1000
+
+def _deal_export():
+    return select(
+        Deal.id, Deal.client_id, Client.company.label("client_company"),
+        Deal.sales_rep_id, User.name.label("sales_rep_name"), Deal.stage,
+        Deal.estimated_value, Deal.probability, Deal.expected_close,
+        Deal.won_on, Deal.lost_on, Deal.created_at, Deal.updated_at,
+    ).outerjoin(Client, Deal.client_id == Client.id).outerjoin(User, Deal.sales_rep_id == User.id).order_by(Deal.id)
+
+def _payment_schedule_export():
+    return select(
+        PaymentSchedule.id, PaymentSchedule.deal_id, PaymentSchedule.milestone_name,
+        PaymentSchedule.amount_due, PaymentSchedule.due_date, PaymentSchedule.status,
+        PaymentSchedule.paid_on, PaymentSchedule.created_at, PaymentSchedule.updated_at,
+    ).order_by(PaymentSchedule.id)
+
+def _stage_history_export():
+    return select(
+        StageHistory.id, StageHistory.deal_id, StageHistory.stage,
+        StageHistory.entered_at, StageHistory.exited_at,
+    ).order_by(StageHistory.id)
+
+# Only Admins and Owners export everything; SalesReps get the rows of their own deals
+def _scoped(query, user, deal_id):
+    if user['role'] in ['Admin', 'Owner']:
+        return query
+    if deal_id is Deal.id:
+        return query.where(Deal.sales_rep_id == user['user_id'])
+    return query.join(Deal, deal_id == Deal.id).where(Deal.sales_rep_id == user['user_id'])
+
+EXPORTS = {
+    "deals": (_deal_export, Deal.id),
+    "payment_schedules": (_payment_schedule_export, PaymentSchedule.deal_id),
+    "stage_history": (_stage_history_export, StageHistory.deal_id),
+}
+
+def _cell(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _csv_rows(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+    for partition in result.partitions():
+        writer.writerows([_cell(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _ndjson_rows(result):
+    keys = list(result.keys())
+    for partition in result.partitions():
+        yield "".join(dumps(dict(zip(keys, row))) + "\n" for row in partition)
+
+# Stream a table as CSV (default) or NDJSON. The response starts as soon as
+# the first batch is fetched; rows are never materialized as ORM objects.
+@export_bp.route("/export/<string:name>", methods=["GET"])
+@jwt_required
+def export(user, name):
+    if name not in EXPORTS:
+        return jsonify({"message": "Unknown export"}), 404
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"message": "format must be csv or ndjson"}), 400
+    build, deal_id = EXPORTS[name]
+    query = _scoped(build(), user, deal_id)
+
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            yield from (_csv_rows(result) if fmt == "csv" else _ndjson_rows(result))
+        finally:
+            result.close()
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={name}.{fmt}",
+    })
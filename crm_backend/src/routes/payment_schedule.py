@@ -1,29 +1,31 @@
 from flask import Blueprint, request, jsonify
 from src.models import db, PaymentSchedule, Deal # Import necessary models
+from src.bulk import read_bulk_rows, existing_ids, load_by_id, parse_fields, row_result, reject_duplicate_ids, bulk_response, to_int, to_decimal, to_date
+from src.serializers import serialize_payment_schedule, rows_to_dicts, PAYMENT_SCHEDULE_COLUMNS
+from src.change_tracking import record_changes
+from src.events import publish
+from src.outbox import is_deposit, enqueue_deposit_paid
+from sqlalchemy import insert
 import datetime
 
 payment_schedule_bp = Blueprint("payment_schedule_bp", __name__)
 
-# Helper function to serialize payment schedule data
-def serialize_payment_schedule(ps):
-    return {
-        "id": ps.id,
-        "deal_id": ps.deal_id,
-        "milestone_name": ps.milestone_name,
-        "amount_due": str(ps.amount_due), # Convert Decimal to string
-        "due_date": ps.due_date.isoformat() if ps.due_date else None,
-        "status": ps.status,
-        "paid_on": ps.paid_on.isoformat() if ps.paid_on else None,
-        "created_at": ps.created_at.isoformat(),
-        "updated_at": ps.updated_at.isoformat()
-    }
+def publish_status_change(schedule, original_status):
+    publish("payment_schedule.status_changed", schedule.deal.sales_rep_id, deal_id=schedule.deal_id,
+            payment_schedule_id=schedule.id, from_status=original_status, to_status=schedule.status,
+            payment_schedule=serialize_payment_schedule(schedule))
+
+def enqueue_side_effects(schedule, original_status):
+    # Written to the outbox in the caller's transaction, before commit
+    if schedule.status == "paid" and original_status != "paid" and is_deposit(schedule):
+        enqueue_deposit_paid(schedule)
 
 # Get all payment schedules for a specific deal
 @payment_schedule_bp.route("/deals/<int:deal_id>/payment_schedules", methods=["GET"])
 def get_payment_schedules_for_deal(deal_id):
     deal = Deal.query.get_or_404(deal_id)
-    schedules = PaymentSchedule.query.filter_by(deal_id=deal_id).order_by(PaymentSchedule.due_date).all()
-    return jsonify({"payment_schedules": [serialize_payment_schedule(ps) for ps in schedules]})
+    schedules = PaymentSchedule.query.filter_by(deal_id=deal_id).order_by(PaymentSchedule.due_date).with_entities(*PAYMENT_SCHEDULE_COLUMNS).all()
+    return jsonify({"payment_schedules": rows_to_dicts(schedules)})
 
 # Create a new payment schedule for a deal
 @payment_schedule_bp.route("/deals/<int:deal_id>/payment_schedules", methods=["POST"])
@@ -39,7 +41,7 @@ def create_payment_schedule(deal_id):
 
     try:
         new_schedule = PaymentSchedule(
-            deal_id=deal_id,
+            deal=deal,
             milestone_name=data["milestone_name"],
             amount_due=data["amount_due"],
             due_date=datetime.date.fromisoformat(data["due_date"]),
@@ -47,6 +49,7 @@ def create_payment_schedule(deal_id):
             paid_on=datetime.date.fromisoformat(data["paid_on"]) if data.get("paid_on") and data["status"] == "paid" else None
         )
         db.session.add(new_schedule)
+        enqueue_side_effects(new_schedule, None)
         db.session.commit()
         return jsonify({"message": "Payment schedule created successfully", "payment_schedule": serialize_payment_schedule(new_schedule)}), 201
     except Exception as e:
@@ -68,6 +71,7 @@ def update_payment_schedule(schedule_id):
     if "status" in data and data["status"] not in ["pending", "paid"]:
         return jsonify({"message": "Invalid status specified"}), 400
 
+    original_status = schedule.status
     try:
         schedule.milestone_name = data.get("milestone_name", schedule.milestone_name)
         schedule.amount_due = data.get("amount_due", schedule.amount_due)
@@ -83,7 +87,10 @@ def update_payment_schedule(schedule_id):
             schedule.paid_on = None
 
         schedule.updated_at = datetime.datetime.utcnow()
+        enqueue_side_effects(schedule, original_status)
         db.session.commit()
+        if schedule.status != original_status:
+            publish_status_change(schedule, original_status)
         return jsonify({"message": "Payment schedule updated successfully", "payment_schedule": serialize_payment_schedule(schedule)})
     except Exception as e:
         db.session.rollback()
@@ -101,3 +108,85 @@ def delete_payment_schedule(schedule_id):
         db.session.rollback()
         return jsonify({"message": "Failed to delete payment schedule", "error": str(e)}), 500
 
+
+PAYMENT_SCHEDULE_FIELDS = {
+    "deal_id": to_int,
+    "milestone_name": str,
+    "amount_due": to_decimal,
+    "due_date": to_date,
+    "status": str,
+    "paid_on": to_date,
+}
+
+# Create (rows without "id") and update (rows with "id") payment schedules
+# across any number of deals in a single transaction
+@payment_schedule_bp.route("/payment_schedules/bulk", methods=["POST"])
+def bulk_upsert_payment_schedules():
+    rows, error = read_bulk_rows("payment_schedules")
+    if error:
+        return error
+
+    results = [None] * len(rows)
+    parsed = {}
+    for index, row in enumerate(rows):
+        try:
+            if "id" in row:
+                v = parse_fields(row, dict(PAYMENT_SCHEDULE_FIELDS, id=to_int), required=["id"])
+            else:
+                v = parse_fields(row, PAYMENT_SCHEDULE_FIELDS, required=["deal_id", "milestone_name", "amount_due", "due_date", "status"])
+            if "status" in v and v["status"] not in ["pending", "paid"]:
+                raise ValueError("Invalid status specified")
+            parsed[index] = v
+        except ValueError as e:
+            results[index] = row_result(index, "error", message=str(e))
+    reject_duplicate_ids(parsed, results)
+
+    values = parsed.values()
+    deals = existing_ids(Deal.id, [v["deal_id"] for v in values if "deal_id" in v])
+    schedules = load_by_id(PaymentSchedule, [v["id"] for v in values if "id" in v])
+
+    creates, status_changes = [], []
+    for index, v in parsed.items():
+        if "deal_id" in v and v["deal_id"] not in deals:
+            results[index] = row_result(index, "error", message="Deal not found")
+        elif "id" in v and v["id"] not in schedules:
+            results[index] = row_result(index, "error", message="Payment schedule not found")
+        elif "id" in v:
+            schedule = schedules[v.pop("id")]
+            if "status" in v and v["status"] != schedule.status:
+                status_changes.append((schedule, schedule.status))
+            for field, value in v.items():
+                setattr(schedule, field, value)
+            # Same paid_on rules as update_payment_schedule
+            if schedule.status == "paid" and not schedule.paid_on:
+                schedule.paid_on = datetime.date.today()
+            elif schedule.status == "pending":
+                schedule.paid_on = None
+            schedule.updated_at = datetime.datetime.utcnow()
+            results[index] = row_result(index, "updated", id=schedule.id)
+        else:
+            if v["status"] != "paid":
+                v["paid_on"] = None
+            creates.append((index, v))
+
+    try:
+        if creates:
+            new_ids = db.session.scalars(
+                insert(PaymentSchedule).returning(PaymentSchedule.id, sort_by_parameter_order=True),
+                [v for _, v in creates],
+            ).all()
+            record_changes(db.session, "payment_schedules", new_ids)
+            for schedule_id, (index, _) in zip(new_ids, creates):
+                results[index] = row_result(index, "created", id=schedule_id)
+            created_paid = [schedule_id for schedule_id, (_, v) in zip(new_ids, creates) if v["status"] == "paid"]
+            for schedule in load_by_id(PaymentSchedule, created_paid).values():
+                enqueue_side_effects(schedule, None)
+        for schedule, original_status in status_changes:
+            enqueue_side_effects(schedule, original_status)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to save payment schedules", "error": str(e)}), 500
+    for schedule, original_status in status_changes:
+        publish_status_change(schedule, original_status)
+    return bulk_response(results)
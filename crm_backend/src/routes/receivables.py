@@ -0,0 +1,127 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, func, case, cast, BigInteger
+from src.models import db, Deal, PaymentSchedule
+from src.auth import jwt_required
+from src.pagination import parse_filter
+from decimal import Decimal
+import datetime
+
+receivables_bp = Blueprint("receivables_bp", __name__)
+
+# Amounts are summed as integer cents and converted back to Decimal, so
+# totals are exact on SQLite (which has no decimal type) as well as Postgres.
+# Probability-weighted deal values are rounded to the cent per deal first.
+def _cents(expression):
+    return func.sum(cast(func.round(expression * 100), BigInteger))
+
+def _money(cents):
+    return str(Decimal(cents or 0).scaleb(-2))
+
+def _scoped(query, user):
+    # SalesReps only see receivables and pipeline on their own deals
+    if user['role'] not in ['Admin', 'Owner']:
+        query = query.where(Deal.sales_rep_id == user['user_id'])
+    return query
+
+AGING_BUCKETS = [("1-30", 1, 30), ("31-60", 31, 60), ("61-90", 61, 90)]
+
+# Pending payment schedules grouped by how far past due they are. Buckets
+# are date ranges on due_date, so the query is a single range scan of the
+# (status, due_date) index.
+@receivables_bp.route("/receivables/aging", methods=["GET"])
+@jwt_required
+def get_aging(user):
+    try:
+        as_of = parse_filter(request.args, "as_of", datetime.date.fromisoformat, "an ISO date") if request.args.get("as_of") else datetime.date.today()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    due = PaymentSchedule.due_date
+    bucket = case(
+        (due >= as_of, "current"),
+        *[(due >= as_of - datetime.timedelta(days=last), name) for name, _, last in AGING_BUCKETS],
+        else_="90+",
+    ).label("bucket")
+    query = (select(bucket, func.count(), _cents(PaymentSchedule.amount_due))
+             .join(Deal, PaymentSchedule.deal_id == Deal.id)
+             .where(PaymentSchedule.status == "pending")
+             .group_by(bucket))
+    totals = {name: (count, cents) for name, count, cents in db.session.execute(_scoped(query, user)).all()}
+
+    buckets = []
+    for name, first, last in [("current", None, None)] + AGING_BUCKETS + [("90+", 91, None)]:
+        count, cents = totals.get(name, (0, 0))
+        buckets.append({"bucket": name, "minDaysOverdue": first, "maxDaysOverdue": last,
+                        "count": count, "amount": _money(cents)})
+    return jsonify({
+        "asOf": as_of.isoformat(),
+        "buckets": buckets,
+        "totalCount": sum(count for count, _ in totals.values()),
+        "totalAmount": _money(sum(cents or 0 for _, cents in totals.values())),
+    })
+
+def _period_starts(start, interval, periods):
+    """``periods + 1`` boundaries: weeks begin on Monday, months on the 1st."""
+    if interval == "week":
+        first = start - datetime.timedelta(days=start.weekday())
+        return [first + datetime.timedelta(weeks=i) for i in range(periods + 1)]
+    boundaries = []
+    for i in range(periods + 1):
+        month = start.month - 1 + i
+        boundaries.append(datetime.date(start.year + month // 12, month % 12 + 1, 1))
+    return boundaries
+
+def _bucketed(column, boundaries):
+    """Index of the period ``column`` falls in, as a CASE over the boundaries."""
+    return case(*[(column < boundary, index) for index, boundary in enumerate(boundaries[1:])]).label("period")
+
+# Expected cash per week or month: pending payment schedules by due_date plus
+# open deals' estimated_value x probability by expected_close
+@receivables_bp.route("/receivables/forecast", methods=["GET"])
+@jwt_required
+def get_cash_flow_forecast(user):
+    interval = request.args.get("interval", "month")
+    if interval not in ("week", "month"):
+        return jsonify({"message": "interval must be week or month"}), 400
+    try:
+        start = parse_filter(request.args, "from", datetime.date.fromisoformat, "an ISO date") if request.args.get("from") else datetime.date.today()
+        periods = parse_filter(request.args, "periods", int, "an integer") if request.args.get("periods") else 12
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if not 1 <= periods <= 104:
+        return jsonify({"message": "periods must be between 1 and 104"}), 400
+
+    boundaries = _period_starts(start, interval, periods)
+    window_start, window_end = boundaries[0], boundaries[-1]
+
+    due = PaymentSchedule.due_date
+    period = _bucketed(due, boundaries)
+    scheduled = dict(db.session.execute(_scoped(
+        select(period, _cents(PaymentSchedule.amount_due))
+        .join(Deal, PaymentSchedule.deal_id == Deal.id)
+        .where(PaymentSchedule.status == "pending", due >= window_start, due < window_end)
+        .group_by(period), user)).all())
+
+    overdue = db.session.execute(_scoped(
+        select(_cents(PaymentSchedule.amount_due))
+        .join(Deal, PaymentSchedule.deal_id == Deal.id)
+        .where(PaymentSchedule.status == "pending", due < window_start), user)).scalar()
+
+    closes = Deal.expected_close
+    period = _bucketed(closes, boundaries)
+    weighted = dict(db.session.execute(_scoped(
+        select(period, _cents(Deal.estimated_value * Deal.probability))
+        .where(Deal.won_on.is_(None), Deal.lost_on.is_(None), closes >= window_start, closes < window_end)
+        .group_by(period), user)).all())
+
+    rows = []
+    for index in range(periods):
+        scheduled_cents, weighted_cents = scheduled.get(index) or 0, weighted.get(index) or 0
+        rows.append({
+            "start": boundaries[index].isoformat(),
+            "end": (boundaries[index + 1] - datetime.timedelta(days=1)).isoformat(),
+            "scheduledReceivables": _money(scheduled_cents),
+            "weightedPipeline": _money(weighted_cents),
+            "total": _money(scheduled_cents + weighted_cents),
+        })
+    return jsonify({"interval": interval, "overdueReceivables": _money(overdue), "periods": rows})
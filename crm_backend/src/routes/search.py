@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.models import db
+from src.auth import jwt_required
+from src.pagination import parse_limit, encode_cursor, decode_cursor
+from src.search import search_rows, match_expression, TYPES
+
+search_bp = Blueprint("search_bp", __name__)
+
+# Ranked full-text search with prefix matching ("acm sm" finds "Acme", "Smith").
+# Pages are keyed on (tier, score, type, id); pass next_cursor back as ?cursor=.
+@search_bp.route("/search", methods=["GET"])
+@jwt_required
+def search(user):
+    q = request.args.get("q", "")
+    if not match_expression(q, "sqlite"):
+        return jsonify({"message": "q must contain at least one word"}), 400
+    types = request.args["type"].split(",") if request.args.get("type") else TYPES
+    if any(kind not in TYPES for kind in types):
+        return jsonify({"message": f"type must be one or more of {', '.join(TYPES)}"}), 400
+    try:
+        limit = parse_limit(request.args, default=20, maximum=100)
+        after = decode_cursor(request.args["cursor"], [int, float, str, int]) if request.args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Clients are shared; deals and action items are limited to a SalesRep's own deals
+    sales_rep_id = None if user['role'] in ['Admin', 'Owner'] else user['user_id']
+    rows = search_rows(db.session, q, types=types, sales_rep_id=sales_rep_id, after=after, limit=limit + 1,
+                       candidates=current_app.config.get("SEARCH_CANDIDATES", 500))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].tier, rows[-1].score, rows[-1].type, rows[-1].id])
+    results = [{key: value for key, value in row._asdict().items() if key != "tier"} for row in rows]
+    return jsonify({"results": results, "next_cursor": next_cursor})
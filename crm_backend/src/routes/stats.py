@@ -0,0 +1,69 @@
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import func, case
+from src.models import db, Deal, PaymentSchedule, ArchivedDeal, ArchivedPaymentSchedule
+from src.cache import SummaryCache, watch
+import datetime
+
+stats_bp = Blueprint("stats_bp", __name__)
+
+# The summary is rebuilt only after a committed write to deals or payment
+# schedules (or after the TTL, to pick up writes made by other workers)
+stats_cache = SummaryCache("stats")
+watch(stats_cache, Deal, PaymentSchedule, ArchivedDeal, ArchivedPaymentSchedule)
+
+def _money(value):
+    return str(value if value is not None else 0)
+
+def _totals(model):
+    return db.session.query(
+        func.count(model.id),
+        func.sum(model.estimated_value),
+        func.sum(case((model.won_on.isnot(None), 1), else_=0)),
+        func.sum(case((model.lost_on.isnot(None), 1), else_=0)),
+        func.sum(case((model.won_on.isnot(None), model.estimated_value), else_=0)),
+    ).one()
+
+def compute_stats():
+    is_open = (Deal.won_on.is_(None)) & (Deal.lost_on.is_(None))
+
+    # Open pipeline grouped by stage, with its probability-weighted value
+    by_stage = db.session.query(
+        Deal.stage,
+        func.count(Deal.id),
+        func.sum(Deal.estimated_value),
+        func.sum(Deal.estimated_value * Deal.probability),
+    ).filter(is_open).group_by(Deal.stage).all()
+
+    # Closed deals moved out by src/archive.py still count towards the totals
+    deal_count, total_value, won_count, lost_count, won_value = [
+        sum(value or 0 for value in column) for column in zip(_totals(Deal), _totals(ArchivedDeal))
+    ]
+
+    receivables = {}
+    for model in (PaymentSchedule, ArchivedPaymentSchedule):
+        for status, amount in db.session.query(model.status, func.sum(model.amount_due)).group_by(model.status):
+            receivables[status] = receivables.get(status, 0) + (amount or 0)
+    pipeline_value = sum((row[2] or 0) for row in by_stage)
+    weighted_value = sum((row[3] or 0) for row in by_stage)
+    return {
+        "totalPipelineValue": _money(pipeline_value),
+        "weightedPipelineValue": "%.2f" % weighted_value,
+        "totalContractedValue": _money(won_value),
+        "currentReceivables": _money(receivables.get("pending")),
+        "paidReceivables": _money(receivables.get("paid")),
+        "averageDealSize": "%.2f" % (total_value / deal_count if deal_count else 0),
+        "dealCount": deal_count,
+        "openCount": sum(row[1] for row in by_stage),
+        "wonCount": won_count or 0,
+        "lostCount": lost_count or 0,
+        "pipelineByStage": {
+            stage: {"count": count, "value": _money(value), "weightedValue": "%.2f" % (weighted or 0)}
+            for stage, count, value, weighted in by_stage
+        },
+        "generatedAt": datetime.datetime.utcnow().isoformat(),
+    }
+
+@stats_bp.route("/stats", methods=["GET"])
+def get_stats():
+    stats_cache.ttl = current_app.config.get("STATS_CACHE_TTL", stats_cache.ttl)
+    return jsonify(stats_cache.get(compute_stats))
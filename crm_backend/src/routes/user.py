@@ -1,37 +1,49 @@
 from flask import Blueprint, request, jsonify, current_app
 from src.models import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.auth import public, jwt_required, get_jwt_identity
+from src.serializers import serialize_user, rows_to_dicts, USER_COLUMNS
+from src.conditional import conditional_get
+from src.passwords import hash_password, verify_password, needs_rehash, PasswordHasherBusy
+from src.log import get_logger
 import jwt
 import datetime
-import traceback
+
+log = get_logger(__name__)
 
 user_bp = Blueprint("user_bp", __name__)
 
-# User signup (create user)
+# User signup (create user). Anyone may sign up as a SalesRep; Owner and
+# Admin accounts can only be created with an Owner's token
 @user_bp.route("/users", methods=["POST"])
+@public
 def create_user():
     try:
         data = request.get_json()
-        print("[DEBUG] Incoming signup data:", data)
-        if not data or not data.get("name") or not data.get("email") or not data.get("role") or not data.get("password"):
-            print("[ERROR] Missing required fields.")
+        if not data or not data.get("name") or not data.get("email") or not data.get("password"):
+            log.info("signup.rejected", extra={"reason": "missing_fields"})
             return jsonify({"message": "Missing required fields"}), 400
 
-        if data["role"] not in ["Owner", "Admin", "SalesRep"]:
-            print(f"[ERROR] Invalid role specified: {data['role']}")
+        role = data.get("role") or "SalesRep"
+        if role not in ["Owner", "Admin", "SalesRep"]:
+            log.info("signup.rejected", extra={"reason": "invalid_role", "role": role})
             return jsonify({"message": "Invalid role specified"}), 400
+        if role != "SalesRep":
+            caller = get_jwt_identity()
+            if not caller or caller["role"] != "Owner":
+                log.info("signup.rejected", extra={"reason": "privileged_role", "role": role})
+                return jsonify({"message": "Only an Owner can create Owner or Admin users"}), 403
 
         if User.query.filter_by(email=data["email"]).first():
-            print(f"[ERROR] User with email {data['email']} already exists.")
+            log.info("signup.rejected", extra={"reason": "duplicate_email"})
             return jsonify({"message": "User with this email already exists"}), 409
 
-        # Hash the password
-        password_hash = generate_password_hash(data["password"])
+        # Hash the password (off the request thread, see src/passwords.py)
+        password_hash = hash_password(data["password"])
 
         new_user = User(
             name=data["name"],
             email=data["email"],
-            role=data["role"],
+            role=role,
             password_hash=password_hash
         )
         db.session.add(new_user)
@@ -43,30 +55,34 @@ def create_user():
             "role": new_user.role,
             "created_at": new_user.created_at
         }
-        print(f"[INFO] User created successfully: {user_data}")
+        log.info("signup.created", extra={"user_id": new_user.id, "role": new_user.role})
         return jsonify({"message": "User created successfully", "user": user_data}), 201
+    except PasswordHasherBusy:
+        return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
     except Exception as e:
-        print("[EXCEPTION] Exception occurred during user signup:", e)
-        traceback.print_exc()
+        log.exception("signup.failed")
         return jsonify({"message": "Internal server error", "error": str(e)}), 500
 
 # User login
 @user_bp.route('/auth/login', methods=['POST'], strict_slashes=False)
+@public
 def auth_login():
     try:
-        print("[DEBUG] Auth Login request headers:", dict(request.headers))
-        print("[DEBUG] Auth Login raw data:", request.data)
         data = request.get_json()
-        print("[DEBUG] Auth Login parsed JSON:", data)
         if not data or not data.get('email') or not data.get('password'):
-            print("[ERROR] Missing email or password in auth login.")
+            log.info("login.rejected", extra={"reason": "missing_fields"})
             return jsonify({'message': 'Missing email or password'}), 400
 
         user = User.query.filter_by(email=data['email']).first()
-        if not user or not check_password_hash(user.password_hash, data['password']):
-            print("[ERROR] Invalid email or password for:", data.get('email'))
+        if not user or not verify_password(user.password_hash, data['password']):
+            log.info("login.rejected", extra={"reason": "invalid_credentials"})
             return jsonify({'message': 'Invalid email or password'}), 401
 
+        # Upgrade the stored hash when PASSWORD_HASH_METHOD has changed
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(data['password'])
+            db.session.commit()
+
         # Generate JWT
         payload = {
             'user_id': user.id,
@@ -82,44 +98,33 @@ def auth_login():
             'email': user.email,
             'role': user.role
         }
-        print(f"[INFO] User logged in (auth): {user_data}")
+        log.info("login.succeeded", extra={"user_id": user.id, "role": user.role})
         return jsonify({'token': token, 'user': user_data}), 200
+    except PasswordHasherBusy:
+        return jsonify({'message': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
-        print("[EXCEPTION] Exception occurred during auth login:", e)
-        traceback.print_exc()
+        log.exception("login.failed")
         return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
 
 @user_bp.route("/users", methods=["GET"])
 def get_users():
-    users = User.query.all()
-    output = []
-    for user in users:
-        user_data = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "role": user.role,
-            "created_at": user.created_at,
-            "updated_at": user.updated_at
-        }
-        output.append(user_data)
-    return jsonify({"users": output})
+    def render():
+        users = User.query.with_entities(*USER_COLUMNS).all()
+        return jsonify({"users": rows_to_dicts(users)})
+    return conditional_get([(User.query, User.updated_at, User.id)], render)
 
 @user_bp.route("/users/<int:user_id>", methods=["GET"])
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
-    user_data = {
-        "id": user.id,
-        "name": user.name,
-        "email": user.email,
-        "role": user.role,
-        "created_at": user.created_at,
-        "updated_at": user.updated_at
-    }
-    return jsonify({"user": user_data})
+    return jsonify({"user": serialize_user(user)})
 
+# Users may edit their own name, email and password; only an Owner may edit
+# other users (otherwise a SalesRep could reset the Owner's password and log in as them)
 @user_bp.route("/users/<int:user_id>", methods=["PUT"])
-def update_user(user_id):
+@jwt_required
+def update_user(caller, user_id):
+    if caller["role"] != "Owner" and caller["user_id"] != user_id:
+        return jsonify({"message": "You can only update your own account"}), 403
     user = User.query.get_or_404(user_id)
     data = request.get_json()
 
@@ -130,19 +135,31 @@ def update_user(user_id):
 
     if "role" in data and data["role"] not in ["Owner", "Admin", "SalesRep"]:
          return jsonify({"message": "Invalid role specified"}), 400
+    # Otherwise a self-signed-up SalesRep could promote itself
+    if data.get("role", user.role) != user.role and caller["role"] != "Owner":
+        return jsonify({"message": "Only an Owner can change roles"}), 403
 
     user.name = data.get("name", user.name)
     user.role = data.get("role", user.role)
     # Add password update logic if needed
     if "password" in data and data["password"]:
-        user.password_hash = generate_password_hash(data["password"])
+        try:
+            user.password_hash = hash_password(data["password"])
+        except PasswordHasherBusy:
+            return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
 
     db.session.commit()
     return jsonify({"message": "User updated successfully"})
 
+# Only Owners and Admins delete users, and only an Owner deletes an Owner
 @user_bp.route("/users/<int:user_id>", methods=["DELETE"])
-def delete_user(user_id):
+@jwt_required
+def delete_user(caller, user_id):
+    if caller["role"] not in ["Admin", "Owner"]:
+        return jsonify({"message": "Only an Owner or Admin can delete users"}), 403
     user = User.query.get_or_404(user_id)
+    if user.role == "Owner" and caller["role"] != "Owner":
+        return jsonify({"message": "Only an Owner can delete an Owner"}), 403
     # Add logic here to handle reassignment of deals/action items if necessary
     db.session.delete(user)
     db.session.commit()
@@ -0,0 +1,142 @@
+"""Full-text search over clients, deals and action items.
+
+SQLite uses external-content FTS5 tables kept in sync by triggers, so Core
+bulk inserts are indexed as well as ORM writes. Postgres uses GIN indexes on
+``to_tsvector('simple', ...)`` expressions, which the database maintains
+itself. Either way ``search_rows`` returns ranked hits with prefix matching;
+lower scores rank first on both backends.
+"""
+import re
+from sqlalchemy import text
+
+# Searched text per table. Email punctuation is split so "acme" finds
+# jane@acme.com on Postgres too (SQLite's tokenizer already splits it).
+SEARCHED = {
+    "clients": ["company", "contact_name", "email"],
+    "deals": ["stage"],
+    "action_items": ["description"],
+}
+
+def _pg_document(table, alias="", searched=SEARCHED):
+    prefix = f"{alias}." if alias else ""
+    parts = []
+    for column in searched[table]:
+        value = f"coalesce({prefix}{column}, '')"
+        parts.append(f"translate({value}, '@.', '  ')" if column == "email" else value)
+    return "to_tsvector('simple', " + " || ' ' || ".join(parts) + ")"
+
+def _sqlite_ddl(table, searched=SEARCHED):
+    columns = searched[table]
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+        # Index rows that existed before the triggers did
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def install(connection, searched=SEARCHED):
+    """Create the search indexes for ``searched`` (migrations pass the columns of their version)."""
+    for table in searched:
+        if connection.dialect.name == "postgresql":
+            statements = [f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin ({_pg_document(table, searched=searched)})"]
+        else:
+            statements = _sqlite_ddl(table, searched)
+        for statement in statements:
+            connection.execute(text(statement))
+
+def _terms(q):
+    return re.findall(r"\w+", q.lower())
+
+def match_expression(q, dialect):
+    """Turn free text into a prefix query matching rows containing every word."""
+    terms = _terms(q)
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+# Per entity type: the selected columns, the searched table and its alias,
+# and further joins. The client company is joined in so deal and action item
+# hits are recognizable.
+_BRANCHES = {
+    "client": (
+        "'client' AS type, c.id AS id, CAST(NULL AS INTEGER) AS deal_id, c.company AS title, "
+        "c.contact_name || ' <' || c.email || '>' AS subtitle",
+        "clients", "c", "",
+    ),
+    "deal": (
+        "'deal' AS type, d.id AS id, d.id AS deal_id, cl.company AS title, d.stage AS subtitle",
+        "deals", "d", "LEFT JOIN clients cl ON cl.id = d.client_id",
+    ),
+    "action_item": (
+        "'action_item' AS type, a.id AS id, a.deal_id AS deal_id, a.description AS title, "
+        "cl.company AS subtitle",
+        "action_items", "a", "JOIN deals d ON d.id = a.deal_id LEFT JOIN clients cl ON cl.id = d.client_id",
+    ),
+}
+
+TYPES = list(_BRANCHES)
+
+def _branch(kind, dialect, scope, older):
+    columns, table, alias, joins = _BRANCHES[kind]
+    if dialect == "postgresql":
+        # Postgres matches the base table directly; the GIN index serves the @@
+        document = _pg_document(table, alias)
+        source = f"{table} {alias} {joins} CROSS JOIN to_tsquery('simple', :q) query"
+        match, key, score = f"{document} @@ query", f"{alias}.id", f"-ts_rank({document}, query)"
+    else:
+        fts = f"{table}_fts"
+        source = f"{fts} JOIN {table} {alias} ON {alias}.id = {fts}.rowid {joins}"
+        match, key, score = f"{fts} MATCH :q", f"{fts}.rowid", f"bm25({fts})"
+    # The newest :candidates matches are tier 0; older ones are tier 1 and
+    # are only scored once a page has run through tier 0
+    floor = f"SELECT {key} FROM {source} WHERE {match} {scope} ORDER BY {key} DESC LIMIT 1 OFFSET :floor_offset"
+    tier, bound = ("1", "<") if older else ("0", ">=")
+    return (f"SELECT {columns}, {tier} AS tier, {score} AS score FROM {source} "
+            f"WHERE {match} {scope} AND {key} {bound} coalesce(({floor}), 0)")
+
+def _tier_rows(session, dialect, types, scope, older, after, params):
+    seek = ""
+    if after is not None:
+        seek = "WHERE (hit.score, hit.type, hit.id) > (:after_score, :after_type, :after_id)"
+        params = dict(params, after_score=after[1], after_type=after[2], after_id=after[3])
+    selects = [
+        f"SELECT * FROM (SELECT * FROM ({_branch(kind, dialect, scope if kind != 'client' else '', older)}) hit {seek} "
+        f"ORDER BY hit.score, hit.id LIMIT :limit) {kind}_hits"
+        for kind in types
+    ]
+    sql = " UNION ALL ".join(selects) + " ORDER BY score, type, id LIMIT :limit"
+    return session.execute(text(sql), params).all()
+
+def search_rows(session, q, types=TYPES, sales_rep_id=None, after=None, limit=20, candidates=500):
+    """Up to ``limit`` hits ordered by (tier, score, type, id), after the ``after`` key.
+
+    Tier 0 ranks the ``candidates`` most recently created matches of each
+    type, so the first pages cost a bounded amount of scoring work. Older
+    matches follow as tier 1, ranked among themselves; that scan only runs
+    when a page reaches past tier 0. Each branch is cut to ``limit`` rows
+    before the union is merged, so only one page per type is ever joined and
+    sorted together.
+    """
+    dialect = session.get_bind().dialect.name
+    params = {"q": match_expression(q, dialect), "limit": limit, "floor_offset": candidates - 1}
+    scope = ""
+    if sales_rep_id is not None:
+        scope = "AND d.sales_rep_id = :sales_rep_id"
+        params["sales_rep_id"] = sales_rep_id
+
+    rows = []
+    if after is None or after[0] == 0:
+        rows = _tier_rows(session, dialect, types, scope, False, after, params)
+        after = None
+    if len(rows) < limit:
+        rows += _tier_rows(session, dialect, types, scope, True, after, dict(params, limit=limit - len(rows)))
+    return rows
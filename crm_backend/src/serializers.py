@@ -0,0 +1,151 @@
+"""Shared JSON serialization.
+
+Dates, datetimes and Decimals are handled by the app's JSON provider, so the
+serializers below return plain column values. List endpoints can skip ORM
+hydration entirely by selecting the ``*_COLUMNS`` tuples with
+``Query.with_entities`` and passing the rows to ``rows_to_dicts``.
+"""
+from flask.json.provider import DefaultJSONProvider
+from decimal import Decimal
+import datetime
+import json
+
+from src.models import Deal, Client, User, PaymentSchedule, StageHistory, ActionItem
+
+try:
+    import orjson
+except ImportError:  # optional dependency; the stdlib json path below is used instead
+    orjson = None
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return DefaultJSONProvider.default(value)
+
+def _orjson_default(value):
+    # orjson serializes date/datetime natively; Decimal keeps the API's string form
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_bytes(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default, separators=(",", ":")).encode()
+
+def dumps(obj):
+    return dumps_bytes(obj).decode()
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed.
+
+    Falls back to the stdlib encoder, with the same date and Decimal
+    handling, when orjson is missing or ``sort_keys`` is requested.
+    """
+
+    sort_keys = False
+    default = staticmethod(_json_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs or self.sort_keys:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.sort_keys:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+def rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
+
+# Column tuples for Query.with_entities; labels match the serializer keys.
+# The builders take the model so the same columns can be selected from the
+# archive tables (src/models/archive.py), which mirror the hot ones.
+def deal_columns(model=Deal):
+    return (
+        model.id, model.client_id, model.sales_rep_id, model.stage, model.estimated_value,
+        model.probability, model.created_at, model.updated_at, model.expected_close,
+        model.won_on, model.lost_on,
+        Client.company.label("client_company"), User.name.label("sales_rep_name"),
+    )
+
+DEAL_COLUMNS = deal_columns()
+
+def deal_rows(query, model=Deal):
+    """Select deal_columns(model) from a deal query, joining the client and rep names."""
+    return (query.with_entities(*deal_columns(model))
+            .outerjoin(Client, model.client_id == Client.id)
+            .outerjoin(User, model.sales_rep_id == User.id))
+
+def payment_schedule_columns(model=PaymentSchedule):
+    return (
+        model.id, model.deal_id, model.milestone_name,
+        model.amount_due, model.due_date, model.status,
+        model.paid_on, model.created_at, model.updated_at,
+    )
+
+PAYMENT_SCHEDULE_COLUMNS = payment_schedule_columns()
+
+def stage_history_columns(model=StageHistory):
+    return (model.id, model.deal_id, model.stage, model.entered_at, model.exited_at)
+
+STAGE_HISTORY_COLUMNS = stage_history_columns()
+
+def action_item_columns(model=ActionItem):
+    return (
+        model.id, model.deal_id, model.description, model.owner_id,
+        model.due_date, model.completed_at, model.created_at,
+        model.updated_at, User.name.label("owner_name"),
+    )
+
+ACTION_ITEM_COLUMNS = action_item_columns()
+
+def action_item_rows(query, model=ActionItem):
+    """Select action_item_columns(model) from an action item query, joining the owner name."""
+    return query.with_entities(*action_item_columns(model)).outerjoin(User, model.owner_id == User.id)
+
+CLIENT_COLUMNS = (
+    Client.id, Client.company, Client.contact_name, Client.email, Client.phone,
+    Client.monday_board_id, Client.created_at, Client.updated_at,
+)
+
+USER_COLUMNS = (User.id, User.name, User.email, User.role, User.created_at, User.updated_at)
+
+# Serializers for single ORM objects (create/update responses, detail views)
+def serialize_deal(deal):
+    return {
+        "id": deal.id,
+        "client_id": deal.client_id,
+        "sales_rep_id": deal.sales_rep_id,
+        "stage": deal.stage,
+        "estimated_value": deal.estimated_value,
+        "probability": deal.probability,
+        "created_at": deal.created_at,
+        "updated_at": deal.updated_at,
+        "expected_close": deal.expected_close,
+        "won_on": deal.won_on,
+        "lost_on": deal.lost_on,
+        "client_company": deal.client.company if deal.client else None,
+        "sales_rep_name": deal.sales_rep.name if deal.sales_rep else None,
+    }
+
+def serialize_payment_schedule(ps):
+    return {column.key: getattr(ps, column.key) for column in PAYMENT_SCHEDULE_COLUMNS}
+
+def serialize_stage_history(sh):
+    return {column.key: getattr(sh, column.key) for column in STAGE_HISTORY_COLUMNS}
+
+def serialize_action_item(ai):
+    item = {column.key: getattr(ai, column.key) for column in ACTION_ITEM_COLUMNS[:-1]}
+    item["owner_name"] = ai.owner.name if ai.owner else None
+    return item
+
+def serialize_client(client):
+    return {column.key: getattr(client, column.key) for column in CLIENT_COLUMNS}
+
+def serialize_user(user):
+    return {column.key: getattr(user, column.key) for column in USER_COLUMNS}
@@ -0,0 +1,89 @@
+"""Shared fixtures: the app on a throwaway SQLite database, migrated once.
+
+Run from crm_backend/:
+
+    python -m pytest -q
+"""
+import contextlib
+import datetime
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configure the app before src.main is imported: it reads the environment at import time
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["OUTBOX_DISPATCHER"] = "off"
+os.environ["ARCHIVER"] = "off"
+os.environ["RATE_LIMIT_BACKEND"] = "off"
+os.environ["WEB_CONCURRENCY"] = "1"
+os.environ["EVENT_BACKEND"] = "local"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from sqlalchemy import event
+
+from src.main import app as flask_app
+from src.migrate import run_migrations
+from src.models import db, User, Client
+
+@pytest.fixture(scope="session")
+def app():
+    with flask_app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+    return flask_app
+
+@pytest.fixture(autouse=True)
+def clean_database(app):
+    yield
+    with app.app_context():
+        db.session.remove()
+        with db.engine.begin() as connection:
+            for table in reversed(db.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+def make_token(app, user_id, role="Owner"):
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    payload = {"user_id": user_id, "email": f"user{user_id}@example.com", "role": role, "exp": expires}
+    return jwt.encode(payload, app.config["SECRET_KEY"], algorithm="HS256")
+
+def client_for(app, user_id=1, role="Owner"):
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {make_token(app, user_id, role)}"
+    return client
+
+@pytest.fixture
+def client(app):
+    return client_for(app)
+
+@pytest.fixture
+def people(app):
+    """Ids of an Owner, two SalesReps and two clients."""
+    with app.app_context():
+        users = [User(name="Owner", email="owner@example.com", role="Owner", password_hash="x"),
+                 User(name="Rep A", email="a@example.com", role="SalesRep", password_hash="x"),
+                 User(name="Rep B", email="b@example.com", role="SalesRep", password_hash="x")]
+        clients = [Client(company="Acme", contact_name="Ann", email="ann@acme.example"),
+                   Client(company="Globex", contact_name="Gus", email="gus@globex.example")]
+        db.session.add_all(users + clients)
+        db.session.commit()
+        return {"owner": users[0].id, "rep_a": users[1].id, "rep_b": users[2].id,
+                "clients": [c.id for c in clients]}
+
+@contextlib.contextmanager
+def count_statements(app):
+    """Count the SQL statements executed inside the block (``counter.count``)."""
+    class Counter:
+        count = 0
+    counter = Counter()
+    def listener(*args):
+        counter.count += 1
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
@@ -0,0 +1,30 @@
+import datetime
+
+from src.models import db, Deal, ActionItem
+from tests.conftest import client_for
+
+def make_item(app, people, rep):
+    with app.app_context():
+        deal = Deal(client_id=people["clients"][0], sales_rep_id=people[rep], stage="Lead", estimated_value=100,
+                    probability=0.5, expected_close=datetime.date(2025, 1, 1))
+        db.session.add(deal)
+        db.session.flush()
+        item = ActionItem(deal_id=deal.id, description=f"Call for {rep}", owner_id=people[rep],
+                          due_date=datetime.date(2025, 1, 1))
+        db.session.add(item)
+        db.session.commit()
+        return deal.id, item.id
+
+def test_action_item_list_is_scoped_to_the_callers_deals(app, client, people):
+    deal_a, item_a = make_item(app, people, "rep_a")
+    deal_b, item_b = make_item(app, people, "rep_b")
+    rep = client_for(app, people["rep_a"], "SalesRep")
+
+    def ids(c, query=""):
+        return [item["id"] for item in c.get(f"/api/action_items{query}").json["action_items"]]
+
+    assert ids(rep) == [item_a]
+    assert ids(rep, f"?deal_id={deal_b}") == []
+    assert ids(rep, f"?owner_id={people['rep_b']}") == []
+    assert ids(rep, "?stage=Lead") == [item_a]
+    assert sorted(ids(client)) == sorted([item_a, item_b])
@@ -0,0 +1,34 @@
+import datetime
+
+from src.archive import Archiver
+from src.models import db, Deal, StageHistory, ArchivedDeal
+from src.analytics import record_stage_exits
+
+def make_deal(app, people, closed_days_ago=None):
+    with app.app_context():
+        won_on = datetime.date.today() - datetime.timedelta(days=closed_days_ago) if closed_days_ago else None
+        deal = Deal(client_id=people["clients"][0], sales_rep_id=people["rep_a"], stage="Lead", estimated_value=100,
+                    probability=0.5, won_on=won_on)
+        db.session.add(deal)
+        db.session.flush()
+        history = StageHistory(deal_id=deal.id, stage="Lead", entered_at=datetime.datetime(2025, 1, 1))
+        db.session.add(history)
+        db.session.flush()
+        if won_on:
+            history.exited_at = datetime.datetime(2025, 1, 2)
+            record_stage_exits(db.session, [(history, "Won", deal.sales_rep_id)])
+        db.session.commit()
+        return deal.id, history.id
+
+def test_archived_ids_are_never_reissued(app, client, people):
+    # The newest deal and stage history row are archived, leaving their
+    # stage transition behind
+    archived_deal, archived_history = make_deal(app, people, closed_days_ago=100)
+    assert Archiver(app, after_days=30).run_once() == 1
+    with app.app_context():
+        assert db.session.get(ArchivedDeal, archived_deal) is not None
+
+    deal_id, history_id = make_deal(app, people)
+    assert deal_id > archived_deal and history_id > archived_history
+    # Leaving the stage writes a transition with the new history row's id
+    assert client.put(f"/api/deals/{deal_id}", json={"stage": "Proposal"}).status_code == 200
@@ -0,0 +1,40 @@
+import datetime
+
+from src.models import db, Deal, PaymentSchedule, StageHistory
+from tests.conftest import client_for
+
+def make_deal(app, people, rep):
+    with app.app_context():
+        deal = Deal(client_id=people["clients"][0], sales_rep_id=people[rep], stage="Lead", estimated_value=100,
+                    probability=0.5, expected_close=datetime.date(2025, 1, 1))
+        db.session.add(deal)
+        db.session.flush()
+        db.session.add(StageHistory(deal_id=deal.id, stage="Lead"))
+        db.session.add(PaymentSchedule(deal_id=deal.id, milestone_name="Deposit", amount_due=50,
+                                       due_date=datetime.date(2025, 1, 1), status="paid"))
+        db.session.commit()
+        return deal.id
+
+def test_tombstones_are_scoped_to_the_deal_owner(app, client, people):
+    deal_id = make_deal(app, people, "rep_a")
+    make_deal(app, people, "rep_b")
+    cursors = {name: client_for(app, people[name], role).get("/api/changes").json["cursor"]
+               for name, role in (("owner", "Owner"), ("rep_a", "SalesRep"), ("rep_b", "SalesRep"))}
+    assert client.delete(f"/api/deals/{deal_id}").status_code == 200
+
+    def deleted(name, role):
+        return client_for(app, people[name], role).get(f"/api/changes?since={cursors[name]}").json["deleted"]
+
+    for name, role in (("owner", "Owner"), ("rep_a", "SalesRep")):
+        tombstones = deleted(name, role)
+        assert tombstones["deals"] == [deal_id]
+        assert len(tombstones["payment_schedules"]) == 1 and len(tombstones["stage_history"]) == 1
+    assert all(ids == [] for ids in deleted("rep_b", "SalesRep").values())
+
+def test_cursor_only_moves_forward(app, client, people):
+    make_deal(app, people, "rep_a")
+    first = client.get("/api/changes?limit=1").json
+    assert first["has_more"]
+    second = client.get(f"/api/changes?since={first['cursor']}").json
+    assert second["cursor"] > first["cursor"] and not second["has_more"]
+    assert client.get(f"/api/changes?since={second['cursor']}").json["cursor"] == second["cursor"]
@@ -0,0 +1,98 @@
+import datetime
+
+from src.models import db, Deal, StageHistory
+from tests.conftest import count_statements, client_for
+
+def seed_deals(app, people, n):
+    with app.app_context():
+        for i in range(n):
+            deal = Deal(client_id=people["clients"][i % 2], sales_rep_id=people["rep_a"] if i % 2 else people["rep_b"],
+                        stage="Lead", estimated_value=1000 + i, probability=0.5,
+                        expected_close=datetime.date(2025, 1, 1))
+            db.session.add(deal)
+            db.session.flush()
+            db.session.add(StageHistory(deal_id=deal.id, stage=deal.stage))
+        db.session.commit()
+        return [deal_id for deal_id, in db.session.query(Deal.id).order_by(Deal.id)]
+
+def statements_for(app, client, path):
+    client.get(path)  # warm caches (token, validators) so only the request's own queries are counted
+    with count_statements(app) as counter:
+        response = client.get(path)
+    assert response.status_code == 200
+    return counter.count
+
+def test_deal_list_statement_count_does_not_grow_with_deals(app, client, people):
+    ids = seed_deals(app, people, 3)
+    few = statements_for(app, client, "/api/deals")
+    seed_deals(app, people, 40)
+    many = statements_for(app, client, "/api/deals")
+    assert many == few
+    assert len(client.get("/api/deals").json["deals"]) == 43
+    assert client.get(f"/api/deals/{ids[0]}").json["deal"]["client_company"] == "Acme"
+
+def test_single_deal_loads_client_and_rep_in_one_statement(app, client, people):
+    ids = seed_deals(app, people, 3)
+    assert statements_for(app, client, f"/api/deals/{ids[0]}") == 1
+    seed_deals(app, people, 40)
+    assert statements_for(app, client, f"/api/deals/{ids[-1]}") == 1
+
+def test_rendered_deal_list_is_one_select(app, client, people):
+    seed_deals(app, people, 20)
+    # A changed ETag forces the page to render: validators plus one SELECT for the page
+    with count_statements(app) as counter:
+        response = client.get("/api/deals?limit=20")
+    assert response.status_code == 200
+    rendered = counter.count
+    with count_statements(app) as counter:
+        client.get("/api/deals?limit=20", headers={"If-None-Match": response.headers["ETag"]})
+    assert rendered - counter.count == 1
+
+def test_bulk_update_rejects_a_repeated_deal_id(app, client, people):
+    deal_id = seed_deals(app, people, 1)[0]
+    response = client.post("/api/deals/bulk", json=[
+        {"id": deal_id, "stage": "Proposal"},
+        {"id": deal_id, "stage": "Contract"},
+    ])
+    assert response.status_code == 207
+    assert [r["status"] for r in response.json["results"]] == ["updated", "error"]
+    with app.app_context():
+        history = StageHistory.query.filter_by(deal_id=deal_id).order_by(StageHistory.id).all()
+        assert [(h.stage, h.exited_at is None) for h in history] == [("Lead", False), ("Proposal", True)]
+        assert db.session.get(Deal, deal_id).stage == "Proposal"
+
+def test_bulk_upsert_is_scoped_to_the_callers_deals(app, client, people):
+    rep_b_deal, rep_a_deal = seed_deals(app, people, 2)
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    response = rep.post("/api/deals/bulk", json=[
+        {"id": rep_b_deal, "stage": "Contract"},
+        {"id": rep_a_deal, "sales_rep_id": people["rep_b"]},
+        {"client_id": people["clients"][0], "sales_rep_id": people["rep_b"], "stage": "Lead",
+         "estimated_value": "500.00", "probability": 0.1, "expected_close": "2025-07-01"},
+    ])
+    assert response.status_code == 207
+    results = response.json["results"]
+    assert [r["status"] for r in results] == ["error", "updated", "created"]
+    assert results[0]["message"] == "Deal not found"
+    with app.app_context():
+        assert db.session.get(Deal, rep_b_deal).stage == "Lead"
+        assert db.session.get(Deal, rep_a_deal).sales_rep_id == people["rep_a"]
+        assert db.session.get(Deal, results[2]["id"]).sales_rep_id == people["rep_a"]
+
+def test_deal_card_is_scoped_to_the_deal_owner(app, client, people):
+    rep_b_deal, rep_a_deal = seed_deals(app, people, 2)
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    assert rep.get(f"/api/deals/{rep_a_deal}/full").status_code == 200
+    assert rep.get(f"/api/deals/{rep_b_deal}/full").status_code == 404
+    assert rep.get(f"/api/deals/{rep_b_deal}/full?include_archived=true").status_code == 404
+    assert client.get(f"/api/deals/{rep_b_deal}/full").status_code == 200
+
+def test_deleting_a_deal_invalidates_cached_lists(app, client, people):
+    deal_id = seed_deals(app, people, 2)[0]
+    first = client.get("/api/deals")
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+    assert client.get("/api/deals", headers={"If-None-Match": etag}).status_code == 304
+    assert client.delete(f"/api/deals/{deal_id}").status_code == 200
+    assert client.get("/api/deals", headers={"If-None-Match": etag}).status_code == 200
+    # The latest updated_at is unchanged, so the date alone cannot be trusted
+    assert client.get("/api/deals", headers={"If-Modified-Since": last_modified}).status_code == 200
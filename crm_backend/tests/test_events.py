@@ -0,0 +1,34 @@
+import pytest
+
+from src import events
+from tests.conftest import make_token
+
+@pytest.fixture
+def env(monkeypatch):
+    for name in ("EVENT_BACKEND", "REDIS_URL", "WEB_CONCURRENCY", "SSE_THREADS", "SSE_MAX_SUBSCRIBERS"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+def test_streams_use_only_their_own_threads(env):
+    assert events.create_broadcaster().max_subscribers == 8
+    env.setenv("SSE_THREADS", "16")
+    env.setenv("SSE_MAX_SUBSCRIBERS", "50")
+    assert events.create_broadcaster().max_subscribers == 16
+
+def test_local_backend_refuses_several_workers(env):
+    env.setenv("WEB_CONCURRENCY", "4")
+    env.setenv("EVENT_BACKEND", "local")
+    with pytest.raises(RuntimeError):
+        events.create_broadcaster()
+
+def test_unset_backend_turns_streams_off_for_several_workers(env):
+    env.setenv("WEB_CONCURRENCY", "4")
+    broadcaster = events.create_broadcaster()
+    with pytest.raises(events.StreamsDisabled):
+        broadcaster.subscribe()
+
+def test_full_worker_refuses_new_streams(app, people, monkeypatch):
+    monkeypatch.setattr(events.broadcaster, "max_subscribers", 0)
+    response = app.test_client().get(f"/api/events?token={make_token(app, people['owner'])}")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,30 @@
+import datetime
+import json
+
+from src.models import db, Deal, PaymentSchedule, StageHistory
+from tests.conftest import client_for
+
+def seed(app, people):
+    with app.app_context():
+        for rep in (people["rep_a"], people["rep_b"]):
+            deal = Deal(client_id=people["clients"][0], sales_rep_id=rep, stage="Lead", estimated_value=100,
+                        probability=0.5, expected_close=datetime.date(2025, 1, 1))
+            db.session.add(deal)
+            db.session.flush()
+            db.session.add(StageHistory(deal_id=deal.id, stage="Lead"))
+            db.session.add(PaymentSchedule(deal_id=deal.id, milestone_name="Deposit", amount_due=50,
+                                           due_date=datetime.date(2025, 1, 1), status="pending"))
+        db.session.commit()
+
+def exported_reps(app, client, name):
+    lines = client.get(f"/api/export/{name}?format=ndjson").get_data(as_text=True).splitlines()
+    with app.app_context():
+        deal_ids = [json.loads(line)["deal_id" if name != "deals" else "id"] for line in lines]
+        return sorted(db.session.get(Deal, deal_id).sales_rep_id for deal_id in deal_ids)
+
+def test_sales_rep_exports_only_their_own_deals(app, client, people):
+    seed(app, people)
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    for name in ("deals", "payment_schedules", "stage_history"):
+        assert exported_reps(app, rep, name) == [people["rep_a"]]
+        assert exported_reps(app, client, name) == sorted([people["rep_a"], people["rep_b"]])
@@ -0,0 +1,15 @@
+from sqlalchemy import inspect
+
+from src.models import db
+
+def test_migrated_schema_matches_the_models(app):
+    # Migrations carry their own table snapshots, so a model change without
+    # a migration shows up here as a missing column or index
+    with app.app_context():
+        inspector = inspect(db.engine)
+        for table in db.metadata.sorted_tables:
+            assert inspector.has_table(table.name), table.name
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            assert columns == set(table.columns.keys()), table.name
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= indexes, table.name
@@ -0,0 +1,103 @@
+import datetime
+import http.server
+import json
+import threading
+
+import pytest
+
+from src.models import db, OutboxEvent
+from src.outbox import OutboxDispatcher, enqueue
+
+class Webhook(http.server.BaseHTTPRequestHandler):
+    """Answers each POST with the next status in ``statuses`` and records the body."""
+    statuses = []
+    received = []
+
+    def do_POST(self):
+        self.received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(self.statuses.pop(0))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def webhook():
+    Webhook.statuses, Webhook.received = [], []
+    server = http.server.HTTPServer(("127.0.0.1", 0), Webhook)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield Webhook, f"http://127.0.0.1:{server.server_port}/hook"
+    server.shutdown()
+
+def outbox_event(app):
+    with app.app_context():
+        enqueue("deposit.paid", {"deal": {"id": 1}})
+        db.session.commit()
+        return OutboxEvent.query.one()
+
+def reload(app, event_id):
+    with app.app_context():
+        return db.session.get(OutboxEvent, event_id)
+
+def make_due(app, event_id):
+    with app.app_context():
+        db.session.get(OutboxEvent, event_id).next_attempt_at = datetime.datetime.utcnow()
+        db.session.commit()
+
+def test_failed_delivery_backs_off_then_succeeds(app, webhook):
+    handler, url = webhook
+    handler.statuses = [500, 200]
+    event_id = outbox_event(app).id
+    dispatcher = OutboxDispatcher(app, url, base_delay=30)
+
+    before = datetime.datetime.utcnow()
+    assert dispatcher.run_once() == 1
+    event = reload(app, event_id)
+    assert (event.status, event.attempts) == ("pending", 1)
+    assert "500" in event.last_error
+    # First retry waits base_delay, with +/-20% jitter
+    assert before + datetime.timedelta(seconds=24) <= event.next_attempt_at <= datetime.datetime.utcnow() + datetime.timedelta(seconds=36)
+    assert dispatcher.run_once() == 0  # not due yet
+
+    make_due(app, event_id)
+    assert dispatcher.run_once() == 1
+    event = reload(app, event_id)
+    assert (event.status, event.attempts, event.last_error) == ("delivered", 2, None)
+    assert event.delivered_at is not None
+    assert handler.received == [{"deal": {"id": 1}}] * 2
+
+def test_delivery_gives_up_after_max_attempts(app, webhook):
+    handler, url = webhook
+    handler.statuses = [500, 500]
+    event_id = outbox_event(app).id
+    dispatcher = OutboxDispatcher(app, url, base_delay=30, max_attempts=2)
+
+    dispatcher.run_once()
+    make_due(app, event_id)
+    dispatcher.run_once()
+    event = reload(app, event_id)
+    assert (event.status, event.attempts) == ("failed", 2)
+    assert len(handler.received) == 2
+
+def test_racing_dispatchers_never_claim_the_same_event(app):
+    with app.app_context():
+        for n in range(40):
+            enqueue("deposit.paid", {"n": n})
+        db.session.commit()
+    dispatchers = [OutboxDispatcher(app, "http://127.0.0.1:9/unused", batch_size=10) for _ in range(4)]
+    claims = [[] for _ in dispatchers]
+    start = threading.Barrier(len(dispatchers))
+
+    def claim_all(dispatcher, claimed):
+        start.wait()
+        with app.app_context():
+            while batch := dispatcher.claim():
+                claimed.extend(event_id for event_id, _ in batch)
+
+    threads = [threading.Thread(target=claim_all, args=pair) for pair in zip(dispatchers, claims)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    claimed = [event_id for ids in claims for event_id in ids]
+    assert len(claimed) == len(set(claimed)) == 40
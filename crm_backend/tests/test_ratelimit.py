@@ -0,0 +1,27 @@
+from src.ratelimit import Budget, MemoryLimiter, bucket_class, concurrency_from_env
+
+BUDGETS = {"expensive": Budget(60, 20), "cheap": Budget(600, 100)}
+
+def test_continuation_pages_draw_from_the_cheap_bucket():
+    assert bucket_class("deal_bp.get_deals", {}) == "expensive"
+    assert bucket_class("deal_bp.get_deals", {"cursor": "abc"}) == "cheap"
+    assert bucket_class("stats_bp.get_stats", {"cursor": "abc"}) == "expensive"
+
+def test_a_full_page_through_fits_the_default_budgets():
+    # 40 pages of 500 deals: a 20k-deal board loaded with no waiting
+    limiter = MemoryLimiter(BUDGETS, concurrency=4)
+    pages = [{}] + [{"cursor": str(page)} for page in range(39)]
+    waits = []
+    for args in pages:
+        kind = bucket_class("deal_bp.get_deals", args)
+        waits.append(limiter.take(f"{kind}:SalesRep:1", BUDGETS[kind]))
+    assert waits == [0] * len(pages)
+
+def test_concurrency_cap_follows_the_thread_count(monkeypatch):
+    monkeypatch.delenv("RATE_LIMIT_CONCURRENCY", raising=False)
+    monkeypatch.setenv("GUNICORN_THREADS", "8")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert concurrency_from_env("memory") == 7
+    assert concurrency_from_env("redis") == 28  # one cap for the whole cluster
+    monkeypatch.setenv("RATE_LIMIT_CONCURRENCY", "0")
+    assert concurrency_from_env("memory") == 0
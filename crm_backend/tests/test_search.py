@@ -0,0 +1,19 @@
+from src.models import db, Client
+
+def test_paging_reaches_matches_older_than_the_candidates(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "SEARCH_CANDIDATES", 3)
+    with app.app_context():
+        db.session.add_all(Client(company=f"Zephyr {n}", contact_name="Pat", email=f"pat{n}@zephyr.com") for n in range(8))
+        db.session.commit()
+        expected = {client.id for client in Client.query.filter(Client.company.like("Zephyr%"))}
+
+    found, cursor = [], None
+    while True:
+        page = client.get("/api/search?q=zephyr&limit=2" + (f"&cursor={cursor}" if cursor else "")).json
+        found += [hit["id"] for hit in page["results"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(found) == sorted(expected)
+    # The newest candidates are ranked first
+    assert set(found[:3]) == set(sorted(expected)[-3:])
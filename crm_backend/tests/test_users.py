@@ -0,0 +1,55 @@
+from src import passwords
+from tests.conftest import client_for
+
+def signup(client, role=None, email="new@example.com"):
+    body = {"name": "New", "email": email, "password": "correct horse battery"}
+    if role:
+        body["role"] = role
+    return client.post("/api/users", json=body)
+
+def test_anonymous_signup_creates_a_sales_rep(app):
+    response = signup(app.test_client())
+    assert response.status_code == 201
+    assert response.json["user"]["role"] == "SalesRep"
+
+def test_anonymous_signup_cannot_create_privileged_roles(app):
+    for role in ("Owner", "Admin"):
+        assert signup(app.test_client(), role).status_code == 403
+
+def test_owner_can_create_privileged_roles(app, people):
+    assert signup(client_for(app, people["owner"], "Owner"), "Admin").status_code == 201
+    assert signup(client_for(app, people["rep_a"], "SalesRep"), "Owner", "other@example.com").status_code == 403
+
+def test_sales_rep_cannot_promote_itself(app, people):
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    assert rep.put(f"/api/users/{people['rep_a']}", json={"role": "Owner"}).status_code == 403
+    assert rep.put(f"/api/users/{people['rep_a']}", json={"name": "Renamed"}).status_code == 200
+
+def test_sales_rep_cannot_edit_other_users(app, people):
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    for body in ({"password": "taken over"}, {"email": "rep@example.com"}, {"name": "Renamed"}):
+        assert rep.put(f"/api/users/{people['owner']}", json=body).status_code == 403
+    assert rep.put(f"/api/users/{people['rep_a']}", json={"password": "my own"}).status_code == 200
+    owner = client_for(app, people["owner"], "Owner")
+    assert owner.put(f"/api/users/{people['rep_b']}", json={"email": "b2@example.com"}).status_code == 200
+
+def test_only_owners_and_admins_delete_users(app, people):
+    rep = client_for(app, people["rep_a"], "SalesRep")
+    assert rep.delete(f"/api/users/{people['rep_b']}").status_code == 403
+    assert rep.delete(f"/api/users/{people['owner']}").status_code == 403
+    admin = client_for(app, people["rep_b"], "Admin")
+    assert admin.delete(f"/api/users/{people['owner']}").status_code == 403
+    assert admin.delete(f"/api/users/{people['rep_a']}").status_code == 200
+
+def test_login_is_refused_when_every_hash_slot_is_taken(app):
+    taken = 0
+    while passwords._slots.acquire(blocking=False):
+        taken += 1
+    try:
+        response = signup(app.test_client())
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        for _ in range(taken):
+            passwords._slots.release()
+    assert signup(app.test_client()).status_code == 201
@@ -9,7 +9,7 @@ import CreateClientModal from '@/components/CreateClientModal';
 import PaymentsModal from '@/components/PaymentsModal';
 import { useAuth } from '@/hooks/useAuth';
 import { Deal } from '@/types/crm';
-import { fetchDeals, fetchStageHistory, fetchPaymentSchedules } from '@/lib/apiClient';
+import { fetchDeals, fetchPaymentSchedules } from '@/lib/apiClient';
 
 type DealDays = Record<number, { daysInProcess: number; daysInStage: number }>;
 type DealPayments = Record<number, { totalPaid: number; outstanding: number; payments: any[] }>;
@@ -26,7 +26,8 @@ export default function Home() {
   const loadDeals = useCallback(async () => {
     if (!user) return;
     try {
-      const fetched = await fetchDeals();
+      // Stage history and payments come back inside each deal, in one request per page
+      const fetched = await fetchDeals(['stage_history', 'payment_schedules']);
       const filtered = user.role === 'SalesRep'
         ? fetched.filter((d: Deal) => d.sales_rep_id === user.id)
         : fetched;
@@ -36,38 +37,29 @@ export default function Home() {
       const daysObj: DealDays = {};
       const paymentsObj: DealPayments = {};
 
-      await Promise.all(
-        filtered.map(async (deal: Deal) => {
-          const daysInProcess = Math.max(1, Math.round(
-            (today.getTime() - new Date(deal.created_at).getTime()) / 86400000
+      filtered.forEach((deal: any) => {
+        const daysInProcess = Math.max(1, Math.round(
+          (today.getTime() - new Date(deal.created_at).getTime()) / 86400000
+        ));
+        let daysInStage = 0;
+        const current = (deal.stage_history || []).find((h: any) => !h.exited_at);
+        if (current) {
+          daysInStage = Math.max(1, Math.round(
+            (today.getTime() - new Date(current.entered_at).getTime()) / 86400000
           ));
-          let daysInStage = 0;
-          try {
-            const history = await fetchStageHistory(deal.id);
-            const current = history.find((h: any) => !h.exited_at);
-            if (current) {
-              daysInStage = Math.max(1, Math.round(
-                (today.getTime() - new Date(current.entered_at).getTime()) / 86400000
-              ));
-            }
-          } catch { /* ignore */ }
-          daysObj[deal.id] = { daysInProcess, daysInStage };
+        }
+        daysObj[deal.id] = { daysInProcess, daysInStage };
 
-          try {
-            const payments = await fetchPaymentSchedules(deal.id);
-            const totalPaid = payments
-              .filter((p: any) => p.status === 'paid')
-              .reduce((sum: number, p: any) => sum + parseFloat(p.amount_due), 0);
-            paymentsObj[deal.id] = {
-              totalPaid,
-              outstanding: parseFloat(deal.estimated_value) - totalPaid,
-              payments,
-            };
-          } catch {
-            paymentsObj[deal.id] = { totalPaid: 0, outstanding: parseFloat(deal.estimated_value), payments: [] };
-          }
-        })
-      );
+        const payments = deal.payment_schedules || [];
+        const totalPaid = payments
+          .filter((p: any) => p.status === 'paid')
+          .reduce((sum: number, p: any) => sum + parseFloat(p.amount_due), 0);
+        paymentsObj[deal.id] = {
+          totalPaid,
+          outstanding: parseFloat(deal.estimated_value) - totalPaid,
+          payments,
+        };
+      });
 
       setDealDays(daysObj);
       setDealPayments(paymentsObj);
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { fetchDeals, fetchStageHistory } from '../lib/apiClient';
+import { fetchDeals } from '../lib/apiClient';
 import { Deal, StageHistory } from '../types/crm';
 
 const STAGES = [
@@ -25,20 +25,12 @@ const StatsDashboard = () => {
     const loadStats = async () => {
       try {
         setLoading(true);
-        const fetchedDeals = await fetchDeals();
+        const fetchedDeals = await fetchDeals(['stage_history']);
         setDeals(fetchedDeals || []);
         setError(null);
 
-        const allStageHistories: StageHistory[] = [];
-        await Promise.all(
-          (fetchedDeals || []).map(async (deal: Deal) => {
-            try {
-              const histories = await fetchStageHistory(deal.id);
-              allStageHistories.push(...histories);
-            } catch {
-              // ignore individual deal errors
-            }
-          })
+        const allStageHistories: StageHistory[] = (fetchedDeals || []).flatMap(
+          (deal: any) => deal.stage_history || []
         );
 
         if (allStageHistories.length > 0) {
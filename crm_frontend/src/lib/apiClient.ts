@@ -34,7 +34,7 @@ const apiClient = axios.create({
   getUsers: () => Promise<User[]>;
   createUser: (payload: CreateUserPayload) => Promise<void>;
   updateUser: (id: number, payload: UpdateUserPayload) => Promise<void>;
-  fetchDeals: () => Promise<any[]>;
+  fetchDeals: (include?: string[]) => Promise<any[]>;
   updateDeal: (dealId: number, data: any) => Promise<any>;
   fetchStageHistory: (dealId: number) => Promise<any[]>;
   fetchPaymentSchedules: (dealId: number) => Promise<any[]>;
@@ -65,9 +65,41 @@ apiClient.updateUser = async (id: number, payload: UpdateUserPayload) => {
   await apiClient.patch(`/users/${id}`, payload);
 };
 
-apiClient.fetchDeals = async () => {
-  const response = await apiClient.get('/deals');
-  return response.data.deals;
+const MAX_RETRIES = 5;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// GET that waits out 429 (rate limited) and 503 (server busy) answers for
+// the Retry-After the server sends, then tries again.
+const getWithRetry = async (url: string, config: any) => {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await apiClient.get(url, config);
+    } catch (error: any) {
+      const status = error?.response?.status;
+      if ((status !== 429 && status !== 503) || attempt >= MAX_RETRIES) {
+        throw error;
+      }
+      const retryAfter = Number(error.response.headers?.['retry-after']);
+      await sleep((Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter : 2 ** attempt) * 1000);
+    }
+  }
+};
+
+apiClient.fetchDeals = async (include: string[] = []) => {
+  // The deal list is keyset-paginated; follow next_cursor until exhausted.
+  // `include` attaches child lists (payment_schedules, stage_history,
+  // action_items) to every deal in the same response.
+  const deals: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const response: any = await getWithRetry('/deals', {
+      params: { limit: 500, cursor: cursor || undefined, include: include.length ? include.join(',') : undefined },
+    });
+    deals.push(...response.data.deals);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return deals;
 };
 
 apiClient.updateDeal = async (dealId: number, data: any) => {